@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+import json,sys,os,time,math,random,argparse,platform,tempfile,shutil,gc,subprocess,importlib.util
+from array import array
+try:import numpy as _np
+except ImportError:_np=None
+try:import resource
+except ImportError:resource=None
+
+HERE=os.path.dirname(os.path.abspath(__file__))
+EXECS={"twap":"twap_exec","vwap":"vwap_exec","pov":"pov_exec","iceberg":"iceberg_exec"}
+
+# Engine loaded under its file stem with its dir on sys.path, so forkserver/spawn pool workers can re-import it by name
+def load_engine(path=None):
+    path=os.path.abspath(path or os.path.join(HERE,"0fintechv1en.py"));d,name=os.path.split(os.path.splitext(path)[0])
+    if d not in sys.path:sys.path.insert(0,d)
+    sp=importlib.util.spec_from_file_location(name,path);m=importlib.util.module_from_spec(sp);sys.modules[name]=m;sp.loader.exec_module(m)
+    return m
+
+def peak_rss_kb():
+    if resource is None:return None
+    r=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r//1024 if sys.platform=="darwin" else r
+
+# Synthetic bars: GBM with compound-Poisson lognormal jumps (Merton), drift compensated for the jump mean; same seed and backend give identical bars
+def _poisson(rg,lam):
+    L=math.exp(-lam);k=0;p=rg.random()
+    while p>L:k+=1;p*=rg.random()
+    return k
+
+def gen_bars(n,seed,s0=100.0,mu=0.05,sigma=0.2,lam=10.0,jm=-0.002,js=0.01,bar_ms=60000,t0=1700000000000,backend=None):
+    dt=bar_ms/(252*6.5*3600000.0);sd=sigma*math.sqrt(dt);drift=(mu-0.5*sigma*sigma-lam*(math.exp(jm+0.5*js*js)-1.0))*dt
+    if (backend or ("numpy" if _np is not None else "python"))=="numpy":
+        g=_np.random.default_rng(seed);k=g.poisson(lam*dt,n)
+        r=drift+sd*g.standard_normal(n)+k*jm+_np.sqrt(k)*js*g.standard_normal(n)
+        c=s0*_np.exp(_np.cumsum(r));o=_np.empty(n);o[0]=s0;o[1:]=c[:-1];w=_np.abs(g.standard_normal((2,n)))*(0.5*sd)
+        hi=_np.maximum(o,c)*_np.exp(w[0]);lo=_np.minimum(o,c)*_np.exp(-w[1])
+        vol=_np.floor(1000.0*g.lognormal(0.0,0.5,n)*(1.0+_np.abs(r)/sd))
+        ts=t0+bar_ms*_np.arange(n,dtype=_np.int64)
+        return [array("q",ts.astype(_np.int64).tobytes())]+[array("d",x.astype(_np.float64).tobytes()) for x in (o,hi,lo,c,vol)]
+    rg=random.Random(seed);ld=lam*dt;cols=[array("q"),array("d"),array("d"),array("d"),array("d"),array("d")];p=s0;ga=rg.gauss
+    for i in range(n):
+        k=_poisson(rg,ld);r=drift+sd*ga(0.0,1.0)+(k*jm+math.sqrt(k)*js*ga(0.0,1.0) if k else 0.0);c=p*math.exp(r)
+        v=(t0+i*bar_ms,p,max(p,c)*math.exp(abs(ga(0.0,1.0))*0.5*sd),min(p,c)*math.exp(-abs(ga(0.0,1.0))*0.5*sd),c,math.floor(1000.0*rg.lognormvariate(0.0,0.5)*(1.0+abs(r)/sd)))
+        for a,x in zip(cols,v):a.append(x)
+        p=c
+    return cols
+
+def bars_csv(cols):
+    return "timestamp,open,high,low,close,volume\n"+"\n".join(map("%d,%.4f,%.4f,%.4f,%.4f,%d".__mod__,zip(*cols)))+"\n"
+
+# Harness: each size/case timed best-of-N in its own worker process, so peak RSS belongs to that case alone; base_rss_kb is the worker's peak with the bars built, before the case ran
+def plugins(path):
+    try:
+        with open(path,"r",encoding="utf-8") as f:return json.load(f)
+    except (OSError,ValueError):return {}
+
+def bench_cfg(m,pl,execn="plain",strat=None,engine="scalar"):
+    cfg=json.loads(json.dumps(m.STATE["cfg"]));cfg["engine"]=engine;cfg["risk"]["max_drawdown"]=1.0;cfg["risk"]["daily_loss_limit"]=1e18
+    if execn!="plain":
+        ex=pl.get("execution_plugins",{}).get(EXECS[execn])
+        if ex is None:raise KeyError("exec plugin missing: "+EXECS[execn])
+        cfg["execution"].update(json.loads(json.dumps(ex)))
+    if strat:cfg["strategy"]=json.loads(json.dumps(pl["strategy_plugins"][strat]))
+    return cfg
+
+def timed(fn,repeat):
+    best=None;r=None
+    for _ in range(max(1,repeat)):
+        gc.collect();t=time.perf_counter();r=fn();dt=time.perf_counter()-t
+        if best is None or dt<best:best=dt
+    return best,r
+
+def run_case(m,pl,case,n,seed,repeat=3,engine="scalar",out=None,backend=None):
+    cols=gen_bars(n,seed,backend=backend)
+    if case=="load":
+        txt=bars_csv(cols);del cols;gc.collect();base=peak_rss_kb();st,d=timed(lambda:m.load_bars_csv_text(txt),repeat)
+        return {"secs":st,"rows":len(d),"base_rss_kb":base,"peak_rss_kb":peak_rss_kb()}
+    kind,name=case.split(":",1);cfg=bench_cfg(m,pl,name,None,engine) if kind=="exec" else bench_cfg(m,pl,"plain",name,engine)
+    d=m.BarStore.from_columns(*cols);del cols;gc.collect();base=peak_rss_kb()
+    tmp=out or tempfile.mkdtemp(prefix="fxbench-");od=os.path.join(tmp,"%s-%d"%(case.replace(":","-"),n))
+    try:st,s=timed(lambda:m.backtest(cfg,d,od),repeat)
+    finally:shutil.rmtree(od if out else tmp,ignore_errors=True)
+    return {"secs":st,"bars":s["bars"],"fills":s["fills"],"final_equity":s["final_equity"],"engine":s["engine"],"base_rss_kb":base,"peak_rss_kb":peak_rss_kb()}
+
+def _spawn_case(m,plp,case,n,seed,repeat,engine,out,backend):
+    cmd=[sys.executable,os.path.abspath(__file__),"--case",case,"--engine-path",m.__file__,"--plugins",plp,"--sizes",str(n),"--seed",str(seed),"--repeat",str(repeat),"--engine",engine]
+    cmd+=(["--keep",out] if out else [])+(["--backend",backend] if backend else [])
+    p=subprocess.run(cmd,stdout=subprocess.PIPE,stderr=subprocess.PIPE,universal_newlines=True)
+    try:return json.loads(p.stdout.strip().splitlines()[-1])
+    except (IndexError,ValueError):return {"secs":0.0,"error":(p.stderr.strip().splitlines() or ["worker exited %d"%p.returncode])[-1]}
+
+def run_bench(m,sizes,seed,repeat=3,execs=None,strats=None,plp=None,engine="scalar",out=None,backend=None,log=None):
+    plp=plp or os.path.join(HERE,"0fintechv1en-plugins.json");pl=plugins(plp);execs=["plain"]+list(EXECS) if execs is None else execs
+    strats=sorted(pl.get("strategy_plugins",{})) if strats is None else strats;res=[];gen=[]
+    for n in sizes:
+        t=time.perf_counter();gen_bars(n,seed,backend=backend);dt=time.perf_counter()-t;gen.append({"size":n,"secs":dt,"bars_per_sec":(n/dt) if dt>0 else None})
+        for case in ["load"]+["exec:"+e for e in execs]+["strategy:"+s for s in strats]:
+            r=_spawn_case(m,plp,case,n,seed,repeat,engine,out,backend);secs=r.pop("secs")
+            if r.get("peak_rss_kb") is not None and r.get("base_rss_kb") is not None:r["rss_delta_kb"]=r["peak_rss_kb"]-r["base_rss_kb"]
+            r=dict({"case":case,"size":n,"secs":secs,"bars_per_sec":(n/secs) if secs>0 else None},**r);res.append(r)
+            if log:log(r)
+    return {"engine_version":getattr(m,"ENGINE_VERSION",None),"python":platform.python_version(),"platform":platform.platform(),"numpy":_np.__version__ if _np is not None else None,
+        "backend":backend or ("numpy" if _np is not None else "python"),"seed":seed,"repeat":repeat,"engine":engine,"generator":gen,"results":res,"peak_rss_kb":max([r["peak_rss_kb"] for r in res if r.get("peak_rss_kb") is not None],default=None),"ts":int(time.time()*1000)}
+
+def compare(cur,base):
+    b={(r["case"],r["size"]):r for r in base.get("results",[])};out=[]
+    for r in cur["results"]:
+        o=b.get((r["case"],r["size"]))
+        if o and o.get("bars_per_sec") and r.get("bars_per_sec"):out.append({"case":r["case"],"size":r["size"],"ratio":r["bars_per_sec"]/o["bars_per_sec"],"same_result":o.get("final_equity")==r.get("final_equity")})
+    return out
+
+def main():
+    p=argparse.ArgumentParser();p.add_argument("--engine-path");p.add_argument("--sizes",default="10000,100000,1000000");p.add_argument("--seed",type=int);p.add_argument("--repeat",type=int,default=3)
+    p.add_argument("--exec",default="plain,twap,vwap,pov,iceberg");p.add_argument("--strategies");p.add_argument("--plugins",default=os.path.join(HERE,"0fintechv1en-plugins.json"));p.add_argument("--engine",default="scalar")
+    p.add_argument("--backend",choices=("numpy","python"));p.add_argument("--json",default=os.path.join("out","bench.json"));p.add_argument("--keep");p.add_argument("--compare");p.add_argument("--gen");p.add_argument("--case");a=p.parse_args()
+    m=load_engine(a.engine_path);seed=a.seed if a.seed is not None else int(m.STATE["cfg"].get("seed",0))
+    if a.backend=="numpy" and _np is None:sys.exit("numpy not available")
+    if a.gen:
+        n=int(a.sizes.split(",")[0]);t=time.perf_counter();cols=gen_bars(n,seed,backend=a.backend)
+        with open(a.gen,"w",encoding="utf-8") as f:f.write(bars_csv(cols))
+        print("wrote %d bars to %s in %.2fs"%(n,a.gen,time.perf_counter()-t));return
+    if a.case:
+        try:r=run_case(m,plugins(a.plugins),a.case,int(a.sizes.split(",")[0]),seed,a.repeat,a.engine,a.keep,a.backend)
+        except Exception as e:r={"secs":0.0,"error":str(e)}
+        print(json.dumps(r));return
+    bad=[e for e in a.exec.split(",") if e and e!="plain" and e not in EXECS]
+    if bad:p.error("unknown exec algo: "+",".join(bad))
+    strats=[s for s in a.strategies.split(",") if s] if a.strategies is not None else None
+    res=run_bench(m,[int(x) for x in a.sizes.split(",") if x],seed,a.repeat,[e for e in a.exec.split(",") if e],strats,a.plugins,a.engine,a.keep,a.backend,
+        lambda r:print("%-40s %9d %9.3fs %12s bars/s %10s KB%s"%(r["case"],r["size"],r["secs"],"%.0f"%r["bars_per_sec"] if r["bars_per_sec"] else "-",r.get("rss_delta_kb","-")," "+r["error"] if "error" in r else ""),flush=True))
+    if a.compare:
+        with open(a.compare,"r",encoding="utf-8") as f:res["compare"]=compare(res,json.load(f))
+        for c in res["compare"]:print("%-40s %9d x%.3f%s"%(c["case"],c["size"],c["ratio"],"" if c["same_result"] else " (result changed)"))
+    os.makedirs(os.path.dirname(os.path.abspath(a.json)),exist_ok=True)
+    with open(a.json,"w",encoding="utf-8") as f:json.dump(res,f,indent=2)
+    print("max case peak rss %s KB, results in %s"%(res["peak_rss_kb"],a.json))
+
+if __name__=="__main__":main()
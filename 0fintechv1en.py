@@ -1,13 +1,53 @@
 #!/usr/bin/env python
-import http.server,socketserver,json,sys,os,io,base64,hashlib,random,time,math,csv,urllib.request,urllib.parse,threading,argparse,traceback
+import http.server,socketserver,json,sys,os,io,base64,hashlib,random,time,math,csv,urllib.request,urllib.error,urllib.parse,threading,argparse,traceback,bisect,itertools,multiprocessing,collections,operator,heapq,gzip,zlib,mmap,struct,shutil,pathlib
+from concurrent.futures import ProcessPoolExecutor,ThreadPoolExecutor
+from array import array
+try:import numpy as _np
+except ImportError:_np=None
 
-STATE={"cfg":{"seed":123456789,"initial_cash":100000000.0,"risk":{"max_position":10000000.0,"max_notional":100000000000.0,"max_drawdown":0.25,"daily_loss_limit":5000000.0,"per_trade_loss_limit":1000000.0},"execution":{"fee_bps":0.2,"slip_bps":0.8,"twap":{"enabled":False,"slices":10,"duration_ms":900000},"vwap":{"enabled":False,"window":50},"pov":{"enabled":False,"participation":0.1}},"strategy":{"type":"rule_chain","params":{"fast":20,"slow":100,"rsiw":14},"rules":[{"if":"sma(close,fast)>sma(close,slow) and rsi(close,rsiw)<70","do":"BUY","qty":1000},{"if":"sma(close,fast)<sma(close,slow) or rsi(close,rsiw)>80","do":"SELL_ALL"}]},"rbac":{"roles":{"admin":{"caps":["config.write","run.execute","module.load","data.ingest","stream.manage","import.plugin","export.files"]},"ops":{"caps":["run.execute","data.ingest","stream.manage","import.plugin","export.files"]},"viewer":{"caps":["export.files"]}}},"profile":"paper"},"data":[],"audit":[],"trace":[],"running":False,"outdir":"out","modules":{"data":{},"strategy":{},"exec":{},"risk":{}},"commits":[],"streams":{},"daily":{"start_ts":0,"start_equity":0.0,"loss":0.0}}
+STATE={"cfg":{"seed":123456789,"initial_cash":100000000.0,"risk":{"max_position":10000000.0,"max_notional":100000000000.0,"max_drawdown":0.25,"daily_loss_limit":5000000.0,"per_trade_loss_limit":1000000.0},"execution":{"fee_bps":0.2,"slip_bps":0.8,"twap":{"enabled":False,"slices":10,"duration_ms":900000},"vwap":{"enabled":False,"window":50},"pov":{"enabled":False,"participation":0.1}},"strategy":{"type":"rule_chain","params":{"fast":20,"slow":100,"rsiw":14},"rules":[{"if":"sma(close,fast)>sma(close,slow) and rsi(close,rsiw)<70","do":"BUY","qty":1000},{"if":"sma(close,fast)<sma(close,slow) or rsi(close,rsiw)>80","do":"SELL_ALL"}]},"rbac":{"roles":{"admin":{"caps":["config.write","run.execute","module.load","data.ingest","stream.manage","import.plugin","export.files"]},"ops":{"caps":["run.execute","data.ingest","stream.manage","import.plugin","export.files"]},"viewer":{"caps":["export.files"]}}},"profile":"paper","engine":"scalar"},"data":[],"audit":[],"trace":[],"log":[],"running":False,"outdir":"out","modules":{"data":{},"strategy":{},"exec":{},"risk":{}},"commits":[],"streams":{},"daily":{"start_ts":0,"start_equity":0.0,"loss":0.0},"jobs":{},"live":{},"run_id":"boot","cachedir":"","cache_bytes":2147483648,"result_cache_bytes":1073741824,"datasets":{},"dataset_bytes":1073741824,"metrics_sample":64}
 
 def now_ms():return int(time.time()*1000)
 def hcfg(c):return hashlib.sha256(json.dumps(c,sort_keys=True,separators=(",",":")).encode("utf-8")).hexdigest()
 def write_text(p,t):os.makedirs(os.path.dirname(p),exist_ok=True);open(p,"w",encoding="utf-8").write(t)
-def write_lines(p,ls):os.makedirs(os.path.dirname(p),exist_ok=True);open(p,"w",encoding="utf-8").write("\n".join(ls))
 def load_json(p):return json.load(open(p,"r",encoding="utf-8"))
+
+# Streaming recorder: buffered JSONL writer keeping only a bounded tail in memory
+class Recorder:
+    __slots__=("path","buf","tail","flush_n","n","f","lock","ro")
+    def __init__(self,path,flush_n=4096,tail_n=1000):
+        self.ro=False;self.path=path;self.buf=[];self.tail=collections.deque(maxlen=tail_n);self.flush_n=max(1,flush_n);self.n=0;self.lock=threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".",exist_ok=True)
+        if os.path.lexists(path):os.remove(path)
+        self.f=open(path,"w",encoding="utf-8")
+    def append(self,ln):
+        if self.ro:raise ValueError("read_only_recorder")
+        self.buf.append(ln);self.tail.append(ln);self.n+=1
+        if len(self.buf)>=self.flush_n:self.flush()
+    def flush(self):
+        with self.lock:
+            if self.ro or not self.buf:return
+            buf=self.buf;self.buf=[];t0=time.perf_counter()
+            f=self.f or open(self.path,"a",encoding="utf-8")
+            f.write("\n".join(buf));f.write("\n")
+            if self.f is None:f.close()
+            METRICS.inc("fintech_recorder_flush_seconds_total",time.perf_counter()-t0);METRICS.inc("fintech_recorder_lines_total",len(buf))
+    def close(self):
+        self.flush()
+        if self.f is not None:self.f.close();self.f=None
+    def __iter__(self):return iter(list(self.tail))
+    def __len__(self):return self.n
+    @classmethod
+    def attach(cls,path,tail_n=1000,n=0):
+        r=cls.__new__(cls);r.path=path;r.buf=[];r.tail=collections.deque(_tail_lines(path,tail_n),maxlen=tail_n);r.flush_n=4096;r.n=n;r.f=None;r.lock=threading.Lock();r.ro=True
+        return r
+
+def _tail_lines(path,n):
+    with open(path,"rb") as f:
+        f.seek(0,2);end=f.tell();pos=end;buf=b""
+        while pos>0 and buf.count(b"\n")<=n:
+            k=min(1<<16,pos);pos-=k;f.seek(pos);buf=f.read(k)+buf
+    return [ln.decode("utf-8") for ln in buf.split(b"\n")[-n-1:] if ln][-n:] if n>0 else []
 def parse_ts(ts):
     try:return int(ts)
     except:
@@ -17,95 +57,555 @@ def parse_ts(ts):
             except:pass
         return 0
 
+# Columnar bar store: contiguous ts/ohlcv columns (48 bytes per bar), slices are zero-copy views
+BAR_COLS=("ts","open","high","low","close","volume")
+class BarStore:
+    __slots__=BAR_COLS+("sha","frozen")
+    def __init__(self,ts=None,open=None,high=None,low=None,close=None,volume=None):
+        self.sha=None;self.frozen=False
+        self.ts=array("q") if ts is None else ts
+        self.open=array("d") if open is None else open;self.high=array("d") if high is None else high
+        self.low=array("d") if low is None else low;self.close=array("d") if close is None else close
+        self.volume=array("d") if volume is None else volume
+    @classmethod
+    def from_columns(cls,ts,o,h,l,c,v):
+        n=len(ts)
+        if all(map(operator.lt,ts,itertools.islice(ts,1,None))):
+            return cls(*[x if isinstance(x,array) and x.typecode==tc else array(tc,x) for tc,x in zip("qddddd",(ts,o,h,l,c,v))])
+        idx=sorted(range(n),key=ts.__getitem__)
+        keep=[i for j,i in enumerate(idx) if j+1==n or ts[idx[j+1]]!=ts[i]]
+        return cls(*[array(tc,(col[i] for i in keep)) for tc,col in (("q",ts),("d",o),("d",h),("d",l),("d",c),("d",v))])
+    @classmethod
+    def from_rows(cls,rows):
+        cs=([],[],[],[],[],[])
+        for r in rows:
+            for a,k in zip(cs,BAR_COLS):a.append(r.get(k,0.0) if k=="volume" else r[k])
+        return cls.from_columns(*cs)
+    def __len__(self):return len(self.ts)
+    def __getitem__(self,i):
+        if isinstance(i,slice):
+            a,b,st=i.indices(len(self.ts))
+            if st!=1:raise ValueError("step")
+            return BarStore(*[memoryview(getattr(self,k))[a:b] for k in BAR_COLS])
+        return {"ts":self.ts[i],"open":self.open[i],"high":self.high[i],"low":self.low[i],"close":self.close[i],"volume":self.volume[i]}
+    def __iter__(self):
+        for r in zip(self.ts,self.open,self.high,self.low,self.close,self.volume):yield dict(zip(BAR_COLS,r))
+    def between(self,t0=None,t1=None):
+        a=0 if t0 is None else bisect.bisect_left(self.ts,t0);b=len(self.ts) if t1 is None else bisect.bisect_right(self.ts,t1)
+        return self[a:max(a,b)]
+    def rows(self):return list(self)
+    def copy(self):
+        cs=[]
+        for tc,k in zip("qddddd",BAR_COLS):a=array(tc);a.frombytes(memoryview(getattr(self,k)).cast("B"));cs.append(a)
+        c=BarStore(*cs);c.sha=self.sha;return c
+    def extend(self,o):
+        if self.frozen:raise ValueError("frozen_store")
+        for tc,k in zip("qddddd",BAR_COLS):
+            a=getattr(self,k)
+            if isinstance(a,array):
+                try:a.extend(getattr(o,k));continue
+                except BufferError:pass
+            c=array(tc);c.frombytes(memoryview(a).cast("B"));c.extend(getattr(o,k));setattr(self,k,c)
+        self.sha=None
+    def __reduce__(self):return (BarStore,tuple(getattr(self.copy(),k) for k in BAR_COLS))
+    def nbytes(self):return sum(len(getattr(self,k))*8 for k in BAR_COLS)
+    def mapped(self):return not isinstance(self.close,array)
+    def digest(self):
+        if self.sha is None:
+            h=hashlib.sha256()
+            for k in BAR_COLS:h.update(memoryview(getattr(self,k)).cast("B"))
+            self.sha=h.hexdigest()
+        return self.sha
+    def meta(self):
+        n=len(self.ts)
+        return {"rows":n,"from":self.ts[0] if n else None,"to":self.ts[-1] if n else None,"hash":self.digest(),"bytes":self.nbytes()}
+
+def store_merge(base,new):
+    if not len(new):return base,0
+    if not len(base):return new,len(new)
+    if new.ts[0]>base.ts[-1]:
+        if base.frozen:base=base.copy()
+        base.extend(new);return base,len(new)
+    m=BarStore.from_columns(*[list(getattr(base,k))+list(getattr(new,k)) for k in BAR_COLS])
+    return m,len(m)-len(base)
+
+def data_query(store,q):
+    g=lambda k,d=None:q.get(k,[d])[0]
+    t0=g("from");t1=g("to");off=max(0,int(g("offset",0)));lim=max(0,min(int(g("limit",1000)),1000000))
+    fs=[f for f in (g("fields") or ",".join(BAR_COLS)).split(",") if f]
+    if any(f not in BAR_COLS for f in fs):raise ValueError("bad_fields")
+    v=store.between(None if t0 in(None,"") else int(t0),None if t1 in(None,"") else int(t1));tot=len(v);v=v[off:off+lim]
+    fmt=g("format","columns")
+    if fmt=="bin":
+        return {"X-Rows":str(len(v)),"X-Total":str(tot),"X-Offset":str(off),"X-Fields":",".join(fs),"X-Types":",".join("q" if f=="ts" else "d" for f in fs)},b"".join(bytes(memoryview(getattr(v,f)).cast("B")) for f in fs)
+    o={"total":tot,"offset":off,"rows":len(v),"fields":fs}
+    if fmt=="rows":o["data"]=[dict(zip(fs,r)) for r in zip(*[getattr(v,f) for f in fs])]
+    else:o["columns"]={f:getattr(v,f).tolist() for f in fs}
+    return o
+
+def as_store(d):
+    return d if isinstance(d,BarStore) else BarStore.from_rows(d)
+STATE["data"]=BarStore()
+
+# Fast CSV ingestion: header and timestamp format detected once, then fixed column converters per chunk
+TS_FMTS=("%Y-%m-%d %H:%M:%S","%Y-%m-%d","%Y/%m/%d %H:%M:%S","%Y/%m/%d")
+
+def ts_converter(sample):
+    from time import strptime,mktime
+    try:int(sample);return int
+    except Exception:pass
+    for f in TS_FMTS:
+        try:strptime(sample,f)
+        except Exception:continue
+        cache={}
+        if len(f)==17 and len(sample)==19:
+            def conv(x):
+                if len(x)!=19:return parse_ts(x)
+                k=x[:13];b=cache.get(k)
+                if b is None:b=cache[k]=int(mktime((int(x[0:4]),int(x[5:7]),int(x[8:10]),int(x[11:13]),0,0,0,0,-1)))
+                return b+int(x[14:16])*60+int(x[17:19])
+            return conv
+        def conv(x):
+            b=cache.get(x)
+            if b is None:b=cache[x]=parse_ts(x)
+            return b
+        return conv
+    return parse_ts
+
+def _csv_source(src,chunk):
+    if isinstance(src,os.PathLike):
+        with open(src,"rb") as f:yield from _csv_source(f,chunk)
+        return
+    if isinstance(src,str):src=io.BytesIO(src.encode("utf-8"))
+    elif isinstance(src,(bytes,bytearray,memoryview)):src=io.BytesIO(bytes(src))
+    if not src.seekable():src=io.BufferedReader(src)
+    head=src.peek(2)[:2] if hasattr(src,"peek") else src.read(2)
+    if not hasattr(src,"peek"):src.seek(0)
+    raw=io.BufferedReader(gzip.GzipFile(fileobj=src)) if head==b"\x1f\x8b" else src
+    while True:
+        c=raw.read(chunk)
+        if not c:break
+        yield c
+
+def _csv_header(line):
+    hdr=[h.strip().lower() for h in next(csv.reader([line]))];pos={h:i for i,h in enumerate(hdr)}
+    ix=(pos.get("timestamp",pos.get("ts")),pos["open"],pos["high"],pos["low"],pos["close"],pos.get("volume"))
+    if ix[0] is None:raise ValueError("no timestamp column")
+    return ix,len(hdr)
+
+def ingest_csv(src,chunk=1<<23):
+    t0=time.perf_counter();cols=(array("q"),array("d"),array("d"),array("d"),array("d"),array("d"))
+    st={"rows":0,"bad":0,"bytes":0};ix=None;w=0;conv=None;rest=b""
+    def take(text):
+        nonlocal conv
+        text=text.strip("\n")
+        if not text:return
+        n=text.count("\n")+1;flat=None
+        if '"' not in text and set(map(str.count,text.split("\n"),itertools.repeat(",",n)))=={w-1}:flat=text.replace("\n",",").split(",")
+        if conv is None:
+            first=(flat[:w] if flat is not None else next(csv.reader([text.split("\n",1)[0]])))
+            conv=ts_converter(first[ix[0]] if len(first)>ix[0] else "")
+        new=None
+        if flat is not None:
+            try:new=[array("q",map(conv,flat[ix[0]::w]))]+[array("d",map(float,flat[i::w])) for i in ix[1:5]]+[array("d",map(float,flat[ix[5]::w])) if ix[5] is not None else array("d",bytes(8*n))]
+            except ValueError:new=None
+        if new is None:
+            new=[array("q"),array("d"),array("d"),array("d"),array("d"),array("d")]
+            for r in csv.reader(text.split("\n")):
+                if not r:continue
+                try:v=(conv(r[ix[0]]),float(r[ix[1]]),float(r[ix[2]]),float(r[ix[3]]),float(r[ix[4]]),float(r[ix[5]]) if ix[5] is not None else 0.0)
+                except (IndexError,ValueError):st["bad"]+=1;continue
+                for a,x in zip(new,v):a.append(x)
+        for a,x in zip(cols,new):a.extend(x)
+        st["rows"]+=len(new[0])
+    for c in itertools.chain(_csv_source(src,chunk),[b"\n"]):
+        st["bytes"]+=len(c);buf=rest+c;k=buf.rfind(b"\n")
+        if k<0:rest=buf;continue
+        rest=buf[k+1:];text=buf[:k].decode("utf-8","ignore").replace("\r","")
+        if ix is None:
+            text=text.lstrip("\n")
+            if not text:continue
+            hl,_,text=text.partition("\n");ix,w=_csv_header(hl)
+        take(text)
+    st["bytes"]-=1
+    store=BarStore.from_columns(*cols);dt=time.perf_counter()-t0
+    st.update({"secs":dt,"rows_per_sec":(st["rows"]/dt) if dt>0 else 0.0,"kept":len(store)})
+    return store,st
+
 def load_bars_csv_text(t):
-    rd=csv.DictReader(io.StringIO(t))
-    b=[];ap=b.append
-    for r in rd:
-        ap({"ts":parse_ts(r.get("timestamp",r.get("ts",""))),"open":float(r["open"]),"high":float(r["high"]),"low":float(r["low"]),"close":float(r["close"]),"volume":float(r.get("volume",0.0))})
-    b.sort(key=lambda x:x["ts"]);return b
+    if not t.strip():return BarStore()
+    return ingest_csv(t)[0]
+
+# Binary dataset cache: columns saved under the SHA-256 of the source bytes and memory-mapped on reload
+BARS_MAGIC=b"FXBARS01";BARS_HDR=64
+
+def cache_dir():return STATE.get("cachedir") or os.path.join(os.path.dirname(os.path.abspath(STATE["outdir"])),"cache")
+
+def store_save(store,path):
+    os.makedirs(os.path.dirname(path),exist_ok=True);tmp=path+".tmp"
+    with open(tmp,"wb") as f:
+        f.write(struct.pack("<8sq",BARS_MAGIC,len(store)).ljust(BARS_HDR,b"\0"))
+        for k in BAR_COLS:f.write(memoryview(getattr(store,k)).cast("B"))
+    os.replace(tmp,path)
+
+def store_open(path):
+    with open(path,"rb") as f:
+        mg,n=struct.unpack("<8sq",f.read(16))
+        if mg!=BARS_MAGIC:raise ValueError("bad_cache_file")
+        if n==0:return BarStore()
+        mm=mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ)
+    mv=memoryview(mm);cs=[]
+    for i,k in enumerate(BAR_COLS):o=BARS_HDR+i*8*n;cs.append(mv[o:o+8*n].cast("q" if k=="ts" else "d"))
+    return BarStore(*cs)
+
+def source_sha(src):
+    h=hashlib.sha256()
+    if isinstance(src,os.PathLike):
+        with open(src,"rb") as f:
+            for c in iter(lambda:f.read(1<<23),b""):h.update(c)
+    else:h.update(src.encode("utf-8") if isinstance(src,str) else bytes(src))
+    return h.hexdigest()
+
+def cached_ingest(src):
+    t0=time.perf_counter();key=source_sha(src);p=os.path.join(cache_dir(),key+".bars")
+    if os.path.exists(p):
+        try:
+            store=store_open(p);os.utime(p,None);store.sha=key;dt=time.perf_counter()-t0;METRICS.obs("fintech_ingest_seconds",dt,cached="1");METRICS.inc("fintech_ingest_rows_total",len(store),cached="1")
+            return store,{"rows":len(store),"bad":0,"kept":len(store),"secs":dt,"rows_per_sec":(len(store)/dt) if dt>0 else 0.0,"cached":True,"sha":key}
+        except Exception:pass
+    store,st=ingest_csv(src);store.sha=key;st["cached"]=False;st["sha"]=key
+    try:store_save(store,p);cache_evict()
+    except OSError:pass
+    METRICS.obs("fintech_ingest_seconds",time.perf_counter()-t0,cached="0");METRICS.inc("fintech_ingest_rows_total",st["rows"],cached="0")
+    return store,st
+
+def cache_list():
+    d=cache_dir();out=[]
+    if not os.path.isdir(d):return out
+    for fn in os.listdir(d):
+        if not fn.endswith(".bars"):continue
+        p=os.path.join(d,fn)
+        try:stt=os.stat(p);n=(stt.st_size-BARS_HDR)//48
+        except OSError:continue
+        out.append({"key":fn[:-5],"bytes":stt.st_size,"rows":max(0,n),"used":int(stt.st_mtime*1000)})
+    out.sort(key=lambda e:e["used"],reverse=True);return out
+
+def cache_evict(budget=None):
+    budget=int(STATE.get("cache_bytes",0)) if budget is None else budget
+    es=cache_list();tot=sum(e["bytes"] for e in es);gone=[]
+    for e in reversed(es):
+        if tot<=budget:break
+        try:os.remove(os.path.join(cache_dir(),e["key"]+".bars"));tot-=e["bytes"];gone.append(e["key"])
+        except OSError:pass
+    return gone
+
+def cache_purge(key=""):
+    gone=[]
+    for e in cache_list():
+        if key and e["key"]!=key:continue
+        try:os.remove(os.path.join(cache_dir(),e["key"]+".bars"));gone.append(e["key"])
+        except OSError:pass
+    return gone
+
+def ingest_event(st,src):
+    STATE["log"].append(json.dumps({"ts":now_ms(),"event":"ingest","source":src,"rows":st["rows"],"bad":st["bad"],"kept":st["kept"],"secs":round(st["secs"],4),"rows_per_sec":int(st["rows_per_sec"]),"cached":st.get("cached",False)},separators=(",",":")))
+
+# Dataset registry: immutable stores keyed name@hash, shared by reference between runs; resident (non-mmap) bytes kept under budget by LRU
+def ds_put(name,store,source=""):
+    did="%s@%s"%(name,store.digest()[:12]);reg=STATE["datasets"];e=reg.get(did)
+    if e is None:
+        store.frozen=True
+        e=reg[did]={"id":did,"name":name,"hash":store.digest(),"store":store,"source":source,"created":now_ms(),"used":now_ms()}
+        ds_evict(None,store)
+    e["used"]=now_ms();return e
+
+def ds_get(ref):
+    if not ref:return None
+    if ref.startswith("stream:"):
+        s=STATE["streams"].get(ref[7:]);return None if s is None else s.get("store")
+    reg=STATE["datasets"];e=reg.get(ref)
+    if e is None:
+        es=[x for x in reg.values() if x["name"]==ref or (len(ref)>=8 and x["hash"].startswith(ref))]
+        e=max(es,key=lambda x:x["created"]) if es else None
+    if e is None:return None
+    e["used"]=now_ms();return e["store"]
+
+def ds_meta(e):
+    st=e["store"];m=st.meta();m.update({"id":e["id"],"name":e["name"],"source":e["source"],"created":e["created"],"used":e["used"],"mapped":st.mapped(),"active":st is STATE["data"]})
+    return m
+
+def ds_evict(budget=None,keep=None):
+    budget=int(STATE.get("dataset_bytes",0)) if budget is None else budget;reg=STATE["datasets"]
+    es=sorted((e for e in reg.values() if not e["store"].mapped()),key=lambda e:e["used"]);tot=sum(e["store"].nbytes() for e in es);gone=[]
+    for e in es:
+        if tot<=budget:break
+        if e["store"] is STATE["data"] or e["store"] is keep:continue
+        del reg[e["id"]];tot-=e["store"].nbytes();gone.append(e["id"])
+    return gone
+
+def ds_info():
+    es=list(STATE["datasets"].values())
+    return {"budget":STATE.get("dataset_bytes",0),"resident":sum(e["store"].nbytes() for e in es if not e["store"].mapped()),"mapped":sum(e["store"].nbytes() for e in es if e["store"].mapped()),"entries":[ds_meta(e) for e in sorted(es,key=lambda e:e["used"],reverse=True)]}
 
 def sma(s,w):
-    n=len(s)
-    if n<w or w<=0:return None
-    su=0.0
-    for i in range(n-w,n):su+=s[i]
-    return su/float(w)
+    if len(s)<w or w<=0:return None
+    return _roll_last(RollSMA(w),s)
 
 def ema(s,w):
-    n=len(s)
-    if n<w or w<=0:return None
-    k=2.0/(w+1.0)
-    e=s[n-w]
-    for i in range(n-w+1,n):e=s[i]*k+e*(1.0-k)
-    return e
+    if len(s)<w or w<=0:return None
+    return _roll_last(RollEMA(w),s)
 
 def rsi(c,w):
-    n=len(c)
-    if n<w+1 or w<=0:return None
-    g=0.0; l=0.0
-    for i in range(n-w,n-1):
-        d=c[i+1]-c[i]
-        if d>0:g+=d
-        else:l+=-d
-    if l==0.0:return 100.0
-    rs=g/l
-    return 100.0-(100.0/(1.0+rs))
+    if len(c)<w+1 or w<=0:return None
+    return _roll_last(RollRSI(w),c)
 
-def eval_expr(e,env):
-    def pf(tok):
-        n,rest=tok.split("(",1)
-        args=rest[:-1]
-        parts=[p.strip() for p in args.split(",")]
-        return n.strip(),parts
-    def val(x):
-        if x in env:return env[x]
-        try:return float(x)
-        except:
-            if "(" in x and x.endswith(")"):
-                n,parts=pf(x)
-                if n=="sma":sn=parts[0];w=int(env.get(parts[1],parts[1]));return sma(env[sn],w)
-                if n=="ema":sn=parts[0];w=int(env.get(parts[1],parts[1]));return ema(env[sn],w)
-                if n=="rsi":sn=parts[0];w=int(env.get(parts[1],parts[1]));return rsi(env[sn],w)
-            return None
-    t=e.replace(">="," ≥ ").replace("<="," ≤ ").replace("=="," ≡ ").replace(">"," > ").replace("<"," < ").replace("and"," and ").replace("or"," or ").split()
-    r=[];i=0
+# Rolling indicators: O(1) update per appended bar, value kept in .v
+class RollSMA:
+    __slots__=("w","n","p","ring","v")
+    def __init__(self,w):self.w=w;self.n=0;self.p=0.0;self.ring=[0.0]*(w+1);self.v=None
+    def push(self,x):
+        w=self.w;self.p+=x;self.n+=1;n=self.n;r=self.ring;m=w+1
+        r[n%m]=self.p
+        if n>=w:self.v=(self.p-r[(n+1)%m])/float(w)
+        return self.v
+
+class RollEMA:
+    __slots__=("w","k","n","s","v")
+    def __init__(self,w):self.w=w;self.k=2.0/(w+1.0);self.n=0;self.s=0.0;self.v=None
+    def push(self,x):
+        self.n+=1
+        if self.n<self.w:self.s+=x
+        elif self.n==self.w:self.s+=x;self.v=self.s/float(self.w)
+        else:k=self.k;self.v=x*k+self.v*(1.0-k)
+        return self.v
+
+class RollRSI:
+    __slots__=("w","n","pc","ag","al","v")
+    def __init__(self,w):self.w=w;self.n=0;self.pc=0.0;self.ag=0.0;self.al=0.0;self.v=None
+    def push(self,x):
+        self.n+=1;n=self.n;w=self.w
+        if n==1:self.pc=x;return None
+        d=x-self.pc;self.pc=x
+        g=d if d>0 else 0.0;l=-d if d<0 else 0.0
+        if n<=w:self.ag+=g;self.al+=l
+        elif n==w+1:self.ag=(self.ag+g)/float(w);self.al=(self.al+l)/float(w)
+        else:self.ag=(self.ag*(w-1)+g)/float(w);self.al=(self.al*(w-1)+l)/float(w)
+        if n>w:self.v=100.0 if self.al==0.0 else 100.0-(100.0/(1.0+self.ag/self.al))
+        return self.v
+
+class RollVWAP:
+    __slots__=("w","n","pv","vv","rpv","rv","cur","v")
+    def __init__(self,w):self.w=w;self.n=0;self.pv=0.0;self.vv=0.0;self.rpv=[0.0]*(w+1);self.rv=[0.0]*(w+1);self.cur=None;self.v=None
+    def push(self,x,vol=1.0):
+        self.pv+=x*vol;self.vv+=vol;self.n+=1;m=self.w+1;i=self.n%m;j=(self.n+1)%m
+        self.rpv[i]=self.pv;self.rv[i]=self.vv;dv=self.vv-self.rv[j]
+        self.cur=(self.pv-self.rpv[j])/dv if dv>0 else x
+        if self.n>=self.w:self.v=self.cur
+        return self.v
+
+def _roll_last(o,s,vs=None):
+    if vs is None:
+        for x in s:o.push(x)
+    else:
+        for x,v in zip(s,vs):o.push(x,v)
+    return o.v
+
+class IndReg:
+    KINDS={"sma":RollSMA,"ema":RollEMA,"rsi":RollRSI,"vwap":RollVWAP}
+    VOL={"vwap"}
+    def __init__(self,series):self.series=series;self.ind={};self.by_src={};self.by_vol={}
+    def get(self,kind,sn,w):
+        k=(kind,sn,w);o=self.ind.get(k)
+        if o is None:
+            cls=self.KINDS.get(kind)
+            if cls is None or sn not in self.series or w<=0:return None
+            o=cls(w);self.ind[k]=o
+            if kind in self.VOL:
+                s=self.series[sn];vs=self.series.get("volume");_roll_last(o,s,vs if vs is not None else itertools.repeat(1.0,len(s)));self.by_vol.setdefault(sn,[]).append(o)
+            else:_roll_last(o,self.series[sn]);self.by_src.setdefault(sn,[]).append(o)
+        return o.v
+    def push(self,sn,x,vol=1.0):
+        for o in self.by_src.get(sn,()):o.push(x)
+        for o in self.by_vol.get(sn,()):o.push(x,vol)
+
+# Rule DSL compiler: rules are parsed once into closures over indicator slots
+_CMP={">":lambda a,b:a>b,"<":lambda a,b:a<b,"≥":lambda a,b:a>=b,"≤":lambda a,b:a<=b,"≡":lambda a,b:a==b}
+_PLANS={};_EXPRS={}
+
+def _tokens(e):
+    return e.replace(">="," ≥ ").replace("<="," ≤ ").replace("=="," ≡ ").replace(">"," > ").replace("<"," < ").replace("and"," and ").replace("or"," or ").split()
+
+def _num(x):
+    try:return float(x)
+    except Exception:return None
+
+def _parse_cond(e,params,inds,fold=True):
+    def operand(x):
+        if fold and x in params:return ("c",params[x])
+        c=_num(x)
+        if c is not None:return ("c",c)
+        if "(" in x and x.endswith(")"):
+            n,rest=x.split("(",1);n=n.strip();parts=[q.strip() for q in rest[:-1].split(",")]
+            if n in IndReg.KINDS and len(parts)==2:
+                try:w=int(params.get(parts[1],parts[1]))
+                except Exception:return ("n",None)
+                k=(n,parts[0],w)
+                if k not in inds:inds[k]=len(inds)
+                return ("i",inds[k])
+            return ("n",None)
+        return ("e",x)
+    t=_tokens(e);terms=[];ops=[];i=0
     while i<len(t):
-        tt=t[i]
-        if tt in("and","or"):
-            r.append(tt);i+=1;continue
-        l=tt;op=t[i+1];ri=t[i+2]
-        lv=val(l);rv=val(ri)
-        if lv is None or rv is None:c=False
-        else:
-            if op in (">"," > "):c=lv>rv
-            elif op in ("<"," < "):c=lv<rv
-            elif op=="≥":c=lv>=rv
-            elif op=="≤":c=lv<=rv
-            elif op=="≡":c=(lv==rv)
-            else:c=False
-        r.append(c);i+=3
-    if not r:return False
-    a=r[0];j=1
-    while j<len(r):
-        op=r[j];v=r[j+1]
-        if op=="and":a=a and v
-        elif op=="or":a=a or v
-        j+=2
-    return a
+        if t[i] in("and","or"):ops.append(t[i]);i+=1;continue
+        if i+2>=len(t):raise ValueError("bad_rule:"+e)
+        terms.append((operand(t[i]),t[i+1],operand(t[i+2])));i+=3
+    return {"terms":terms,"ops":ops}
 
-def apply_dsl(dsl,env):
+def _operand_fn(sp):
+    k,x=sp
+    if k=="c":return lambda o,e:x
+    if k=="i":return lambda o,e:o[x].v
+    if k=="e":
+        def env_val(o,e):
+            v=e.get(x)
+            if isinstance(v,list):return v[-1] if v else None
+            return v
+        return env_val
+    return lambda o,e:None
+
+def _compile_cond(ast):
+    def term(l,op,r):
+        f=_CMP.get(op)
+        if f is None:return lambda o,e:False
+        def t(o,e):
+            lv=l(o,e)
+            if lv is None:return False
+            rv=r(o,e)
+            if rv is None:return False
+            return f(lv,rv)
+        return t
+    memo={};seq=[]
+    for k in ast["terms"]:
+        if k not in memo:memo[k]=term(_operand_fn(k[0]),k[1],_operand_fn(k[2]))
+        seq.append(memo[k])
+    if not seq:return lambda o,e:False
+    acc=seq[0]
+    for op,q in zip(ast["ops"],seq[1:]):
+        if op=="and":acc=(lambda p,q:lambda o,e:p(o,e) and q(o,e))(acc,q)
+        elif op=="or":acc=(lambda p,q:lambda o,e:p(o,e) or q(o,e))(acc,q)
+    return acc
+
+def compile_dsl(dsl):
     if dsl.get("type")!="rule_chain":return None
-    for k,v in dsl.get("params",{}).items():env[k]=v
+    key=hcfg(dsl);pl=_PLANS.get(key)
+    if pl is not None:return pl
+    params=dsl.get("params",{});inds={};rules=[]
     for r in dsl.get("rules",[]):
+        a=r.get("do","").upper()
+        if a in("BUY","SELL"):act={"action":a,"qty":float(r.get("qty",0))}
+        elif a in("SELL_ALL","HOLD","CANCEL"):act={"action":a}
+        else:continue
         cond=r.get("if","")
-        if cond=="" or eval_expr(cond,env):
-            a=r.get("do","").upper()
-            if a=="BUY":return {"action":"BUY","qty":float(r.get("qty",0))}
-            if a=="SELL":return {"action":"SELL","qty":float(r.get("qty",0))}
-            if a=="SELL_ALL":return {"action":"SELL_ALL"}
-            if a=="HOLD":return {"action":"HOLD"}
+        ast=None if cond=="" else _parse_cond(cond,params,inds)
+        rules.append((None if ast is None else _compile_cond(ast),act,ast))
+    vec=all(a is None or all(sp[0]!="e" or sp[1]=="close" for t in a["terms"] for sp in (t[0],t[2])) for _,_,a in rules)
+    pl={"key":key,"inds":sorted(inds,key=inds.get),"rules":rules,"params":dict(params),"vec":vec and all(k[1]=="close" for k in inds)}
+    if len(_PLANS)>=256:_PLANS.clear()
+    _PLANS[key]=pl;return pl
+
+def plan_bind(pl,reg):
+    for k in pl["inds"]:reg.get(*k)
+    return [reg.ind.get(k) or _NOIND for k in pl["inds"]]
+
+def plan_eval(pl,objs,env):
+    for f,act,_ in pl["rules"]:
+        if f is None or f(objs,env):return act
     return None
 
+class _NoInd:
+    __slots__=("v",)
+    def __init__(self):self.v=None
+_NOIND=_NoInd()
+
+def _env_reg(env):
+    reg=env.get("_ind")
+    if reg is None:reg=IndReg({k:v for k,v in env.items() if isinstance(v,list)})
+    return reg
+
+def eval_expr(e,env):
+    params={k:v for k,v in env.items() if k!="position" and isinstance(v,(int,float)) and not isinstance(v,bool)}
+    key=(e,tuple(sorted(params.items())));c=_EXPRS.get(key)
+    if c is None:
+        inds={};f=_compile_cond(_parse_cond(e,params,inds,fold=False));c=(f,sorted(inds,key=inds.get))
+        if len(_EXPRS)>=1024:_EXPRS.clear()
+        _EXPRS[key]=c
+    f,ks=c;reg=_env_reg(env)
+    return f(plan_bind({"inds":ks},reg),env)
+
+def apply_dsl(dsl,env):
+    pl=compile_dsl(dsl)
+    if pl is None:return None
+    for k,v in pl["params"].items():env[k]=v
+    return plan_eval(pl,plan_bind(pl,_env_reg(env)),env)
+
+# Vectorized signal precompute: whole-series indicator columns, first matching rule per bar
+class _Cell:
+    __slots__=("v",)
+    def __init__(self):self.v=None
+
+def ind_columns(inds,closes,volumes=None):
+    cols=[]
+    for kind,sn,w in inds:
+        if _np is not None and kind=="sma":
+            x=_np.asarray(closes,dtype=float);c=_np.full(len(x),_np.nan)
+            if 0<w<=len(x):cs=_np.concatenate(([0.0],_np.cumsum(x)));c[w-1:]=(cs[w:]-cs[:-w])/float(w)
+            cols.append(c);continue
+        if _np is not None and kind=="vwap":
+            x=_np.asarray(closes,dtype=float);v=_np.ones(len(x)) if volumes is None else _np.asarray(volumes,dtype=float);c=_np.full(len(x),_np.nan)
+            if 0<w<=len(x):
+                cp=_np.concatenate(([0.0],_np.cumsum(x*v)));cv=_np.concatenate(([0.0],_np.cumsum(v)));dv=cv[w:]-cv[:-w]
+                with _np.errstate(divide="ignore",invalid="ignore"):c[w-1:]=_np.where(dv>0,(cp[w:]-cp[:-w])/dv,x[w-1:])
+            cols.append(c);continue
+        o=IndReg.KINDS[kind](w) if w>0 else None
+        if o is not None and kind in IndReg.VOL:col=[o.push(x,v) for x,v in zip(closes,volumes if volumes is not None else itertools.repeat(1.0))]
+        else:col=[o.push(x) for x in closes] if o else [None]*len(closes)
+        if _np is not None:col=_np.array([_np.nan if v is None else v for v in col],dtype=float)
+        cols.append(col)
+    return cols
+
+def precompute_actions(pl,closes,volumes=None):
+    n=len(closes);cols=ind_columns(pl["inds"],closes,volumes)
+    if _np is None:
+        cells=[_Cell() for _ in cols];env={"close":[0.0]};acts=[-1]*n
+        for i in range(n):
+            for j,c in enumerate(cols):cells[j].v=c[i]
+            env["close"][0]=closes[i]
+            for r,(f,_,_) in enumerate(pl["rules"]):
+                if f is None or f(cells,env):acts[i]=r;break
+        return acts
+    x=_np.asarray(closes,dtype=float)
+    def col(sp):
+        k,v=sp
+        if k=="c":return v
+        if k=="i":return cols[v]
+        if k=="e":return x
+        return None
+    def cond(ast):
+        acc=None
+        for j,(l,op,r) in enumerate(ast["terms"]):
+            lv=col(l);rv=col(r);f=_CMP.get(op)
+            m=_np.zeros(n,dtype=bool) if lv is None or rv is None or f is None else _np.broadcast_to(_np.asarray(f(lv,rv),dtype=bool),(n,))
+            if acc is None:acc=m
+            elif ast["ops"][j-1]=="and":acc=acc&m
+            elif ast["ops"][j-1]=="or":acc=acc|m
+        return _np.zeros(n,dtype=bool) if acc is None else acc
+    acts=_np.full(n,-1,dtype=_np.int64)
+    for r in range(len(pl["rules"])-1,-1,-1):
+        ast=pl["rules"][r][2]
+        if ast is None:acts[:]=r
+        else:acts[cond(ast)]=r
+    return acts.tolist()
+
 def exec_price_fee(side,qty,price,fee_bps,slip_bps):
     adj=price*(slip_bps/10000.0)
     ep=price+(adj if side=="BUY" else -adj)
@@ -122,11 +622,11 @@ def commit_config(actor,role,new_cfg):
         STATE["cfg"]=new_cfg
         cid=hcfg(new_cfg)
         STATE["commits"].append({"ts":now_ms(),"actor":actor,"role":role,"cid":cid})
-        STATE["audit"].append(json.dumps({"ts":now_ms(),"event":"config_commit","actor":actor,"role":role,"cid":cid},separators=(",",":")))
+        STATE["log"].append(json.dumps({"ts":now_ms(),"event":"config_commit","actor":actor,"role":role,"cid":cid},separators=(",",":")))
         return True,cid
     except Exception as e:
         STATE["cfg"]=json.loads(snap)
-        STATE["audit"].append(json.dumps({"ts":now_ms(),"event":"config_rollback","error":str(e)},separators=(",",":")))
+        STATE["log"].append(json.dumps({"ts":now_ms(),"event":"config_rollback","error":str(e)},separators=(",",":")))
         return False,"rollback"
 
 def risk_check_pre(env,cfg,side,qty,price):
@@ -151,77 +651,271 @@ def risk_check_post(env,cfg):
     return True,""
 
 def daily_roll(env,cfg,ts):
-    day=int(ts//86400000)
-    if STATE["daily"]["start_ts"]==0 or int(STATE["daily"]["start_ts"]//86400000)!=day:
-        STATE["daily"]["start_ts"]=ts
-        STATE["daily"]["start_equity"]=env["equity"]
-        STATE["daily"]["loss"]=0.0
+    day=int(ts//86400000);d=env["ctx"].daily
+    if d["start_ts"]==0 or int(d["start_ts"]//86400000)!=day:
+        d["start_ts"]=ts
+        d["start_equity"]=env["equity"]
+        d["loss"]=0.0
 
 def daily_limit_breach(env,cfg):
     lim=float(cfg.get("risk",{}).get("daily_loss_limit",1e18))
     if lim>=1e17:return False
-    cur=STATE["daily"]["start_equity"];loss=max(0.0,cur-env["equity"])
-    STATE["daily"]["loss"]=loss
+    d=env["ctx"].daily;cur=d["start_equity"];loss=max(0.0,cur-env["equity"])
+    d["loss"]=loss
     return loss>lim
 
-def sharpe_from_trace(lines):
-    eq=[]
-    for ln in lines:
-        o=json.loads(ln);eq.append(o["equity"])
-    if len(eq)<3:return None
-    re=[]
-    for i in range(1,len(eq)):
-        if eq[i-1]>0:re.append((eq[i]-eq[i-1])/eq[i-1])
-    if not re:return None
-    avg=sum(re)/float(len(re));var=sum((x-avg)*(x-avg) for x in re)/float(len(re))
-    sd=math.sqrt(var) if var>0 else 0.0
-    if sd==0.0:return None
-    return (avg/sd)*math.sqrt(252.0)
+# Online performance metrics: updated per bar and per fill, summary read in O(1)
+class Perf:
+    __slots__=("bars","n","mean","m2","dsq","peq","peak","mdd","ddb","mddb","expo","notional","fills","fees","held","teq","trades")
+    def __init__(self):
+        self.bars=0;self.n=0;self.mean=0.0;self.m2=0.0;self.dsq=0.0;self.peq=None;self.peak=None;self.mdd=0.0;self.ddb=0;self.mddb=0
+        self.expo=0;self.notional=0.0;self.fills=0;self.fees=0.0;self.held=False;self.teq=0.0;self.trades=array("d")
+    def bar(self,eq,pos):
+        self.bars+=1;p=self.peq;self.peq=eq;o=pos!=0.0
+        if o:self.expo+=1
+        if o!=self.held:
+            self.held=o
+            if o:self.teq=eq if p is None else p
+            else:self.trades.append(eq-self.teq)
+        if p is not None and p>0:
+            r=(eq-p)/p;self.n+=1;d=r-self.mean;self.mean+=d/self.n;self.m2+=d*(r-self.mean)
+            if r<0:self.dsq+=r*r
+        if self.peak is None or eq>=self.peak:self.peak=eq;self.ddb=0
+        else:
+            self.ddb+=1;dd=(self.peak-eq)/self.peak if self.peak>0 else 0.0
+            if dd>self.mdd:self.mdd=dd
+            if self.ddb>self.mddb:self.mddb=self.ddb
+    def fill(self,qty,price,fee,n=1):self.fills+=n;self.notional+=qty*price;self.fees+=fee
+    def sharpe(self):
+        if self.bars<3 or self.n==0:return None
+        sd=math.sqrt(self.m2/self.n) if self.m2>0 else 0.0
+        return None if sd==0.0 else (self.mean/sd)*math.sqrt(252.0)
+    def sortino(self):
+        if self.bars<3 or self.n==0:return None
+        dd=math.sqrt(self.dsq/self.n)
+        return None if dd==0.0 else (self.mean/dd)*math.sqrt(252.0)
+    def trade_pnls(self):
+        t=array("d",self.trades)
+        if self.held and self.peq is not None:t.append(self.peq-self.teq)
+        return t
+    def summary(self,initial):
+        return {"sharpe":self.sharpe(),"sortino":self.sortino(),"max_drawdown":self.mdd,"max_drawdown_bars":self.mddb,"exposure":(self.expo/float(self.bars)) if self.bars else 0.0,"turnover":(self.notional/initial) if initial>0 else 0.0,"fills":self.fills,"fees":self.fees}
 
 def twap_slices(qty,slices):
     if slices<=0:return []
     q=qty/float(slices)
     return [q for _ in range(slices)]
 
-def vwap_price(window,series):
+def vwap_price(window,series,vols=None):
     n=len(series)
     if n==0:return None
     w=min(window,n)
     s=0.0;v=0.0
     for i in range(n-w,n):
-        p=series[i];vol=1.0
+        p=series[i];vol=1.0 if vols is None else vols[i]
         s+=p*vol;v+=vol
     return s/v if v>0 else series[-1]
 
+def vwap_acc(cfg):
+    vw=cfg.get("execution",{}).get("vwap",{})
+    return RollVWAP(max(1,int(vw.get("window",50)))) if vw.get("enabled",False) else None
+
 def pov_qty(target_pov,bar_vol):
     if bar_vol<=0:return 0.0
     return target_pov*bar_vol
 
+# Metrics: process-wide counters and fixed-bucket histograms in Prometheus text format; bar stages are timed on 1 of every STATE["metrics_sample"] bars and scaled up
+LAT_BUCKETS=(0.001,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1.0,2.5,5.0,10.0,30.0,60.0,300.0)
+BPS_BUCKETS=(1e3,1e4,2.5e4,5e4,1e5,2.5e5,5e5,1e6,2.5e6,1e7)
+STAGES=("drain","signal","order","risk","exec","risk_post","trace")
+
+def _lbl(lb):
+    return "{"+",".join('%s="%s"'%(k,str(v).replace("\\","\\\\").replace('"','\\"').replace("\n","\\n")) for k,v in lb)+"}" if lb else ""
+
+class Metrics:
+    def __init__(self):self.lock=threading.Lock();self.c={};self.h={}
+    def inc(self,name,v=1.0,**lb):
+        k=(name,tuple(sorted(lb.items())))
+        with self.lock:self.c[k]=self.c.get(k,0.0)+v
+    def obs(self,name,x,bk=LAT_BUCKETS,**lb):
+        k=(name,tuple(sorted(lb.items())))
+        with self.lock:
+            h=self.h.get(k)
+            if h is None:h=self.h[k]=[bk,[0]*len(bk),0.0,0]
+            i=bisect.bisect_left(bk,x)
+            if i<len(bk):h[1][i]+=1
+            h[2]+=x;h[3]+=1
+    def run(self,kind,ctx,eg=None):
+        dt=time.perf_counter()-ctx.t0 if ctx.t0 else 0.0
+        self.obs("fintech_run_seconds",dt,kind=kind);self.inc("fintech_runs_total",kind=kind,status=ctx.status)
+        self.inc("fintech_bars_total",ctx.bars,kind=kind);self.inc("fintech_fills_total",ctx.perf.fills,kind=kind)
+        if dt>0 and ctx.bars:self.obs("fintech_run_bars_per_second",ctx.bars/dt,BPS_BUCKETS,kind=kind)
+        if eg is not None and eg.ns:self.stages(eg)
+    def stages(self,eg):
+        tm=eg.tm;tm[2]-=tm[3]+tm[4]
+        for n,x in zip(STAGES,tm):self.inc("fintech_stage_seconds_total",x*eg.sm,stage=n)
+        self.inc("fintech_stage_sampled_bars_total",eg.ns);eg.tm=[0.0]*len(STAGES);eg.ns=0
+    def render(self,gauges=()):
+        with self.lock:c=sorted(self.c.items());h=sorted((k,(v[0],list(v[1]),v[2],v[3])) for k,v in self.h.items())
+        out=[];seen=set()
+        def typ(n,t):
+            if n not in seen:seen.add(n);out.append("# TYPE %s %s"%(n,t))
+        for (n,lb),v in c:typ(n,"counter");out.append("%s%s %r"%(n,_lbl(lb),float(v)))
+        for (n,lb),(bk,cs,sm,cnt) in h:
+            typ(n,"histogram");acc=0
+            for b,x in zip(bk,cs):acc+=x;out.append("%s_bucket%s %d"%(n,_lbl(lb+(("le",repr(float(b))),)),acc))
+            out.append("%s_bucket%s %d"%(n,_lbl(lb+(("le","+Inf"),)),cnt));out.append("%s_sum%s %r"%(n,_lbl(lb),float(sm)));out.append("%s_count%s %d"%(n,_lbl(lb),cnt))
+        for n,lb,v in gauges:typ(n,"gauge");out.append("%s%s %r"%(n,_lbl(lb),float(v)))
+        return "\n".join(out)+"\n"
+
+METRICS=Metrics()
+
+def metrics_gauges():
+    js=collections.Counter(c.status for c in list(STATE["jobs"].values()));ds=list(STATE["datasets"].values())
+    g=[("fintech_streams_active",(),sum(1 for x in list(STATE["streams"].values()) if x.get("running"))),("fintech_live_engines",(),len(STATE["live"])),("fintech_datasets",(),len(ds)),("fintech_dataset_resident_bytes",(),sum(e["store"].nbytes() for e in ds if not e["store"].mapped()))]
+    return g+[("fintech_jobs",(("status",k),),v) for k,v in sorted(js.items())]
+
+# Run context: each backtest owns its audit/trace/daily state, progress and cancel flag
+# Run events: bounded ring of serialized events that SSE readers wait on; the engine only publishes every N bars
+class EventBus:
+    __slots__=("cond","buf","seq","closed")
+    def __init__(self,n=4096):self.cond=threading.Condition();self.buf=collections.deque(maxlen=n);self.seq=0;self.closed=False
+    def publish(self,kind,data):
+        with self.cond:self.seq+=1;self.buf.append((self.seq,kind,data));self.cond.notify_all()
+    def close(self,kind=None,data=None):
+        with self.cond:
+            if self.closed:return
+            if kind:self.seq+=1;self.buf.append((self.seq,kind,data))
+            self.closed=True;self.cond.notify_all()
+    def since(self,seq,timeout=15.0):
+        with self.cond:
+            self.cond.wait_for(lambda:self.seq>seq or self.closed,timeout)
+            return [e for e in self.buf if e[0]>seq],self.closed
+
+class RunCtx:
+    __slots__=("id","audit","trace","daily","perf","bars","total","cancel","status","summary","error","submitted","started","finished","events","apos","t0","equity")
+    def __init__(self,rid=None):
+        self.id=rid or hashlib.sha256(("%d-%s"%(time.time_ns(),random.random())).encode()).hexdigest()[:12]
+        self.audit=[];self.trace=[];self.daily={"start_ts":0,"start_equity":0.0,"loss":0.0};self.perf=Perf()
+        self.bars=0;self.total=0;self.cancel=False;self.status="queued";self.summary=None;self.error=None
+        self.submitted=now_ms();self.started=0;self.finished=0;self.events=EventBus();self.apos=0;self.t0=0.0;self.equity=array("d")
+    def info(self):
+        return {"id":self.id,"status":self.status,"bars":self.bars,"total":self.total,"progress":(self.bars/float(self.total)) if self.total else 0.0,"submitted":self.submitted,"started":self.started,"finished":self.finished,"summary":self.summary,"error":self.error}
+    def pulse(self,env):
+        n=len(self.audit);k=n-self.apos
+        if k>0:
+            ls=self.audit[n-k:] if isinstance(self.audit,list) else list(self.audit.tail)[-k:]
+            self.events.publish("audit",'{"dropped":%d,"events":[%s]}'%(k-len(ls),",".join(ls)));self.apos=n
+        dt=time.perf_counter()-self.t0 if self.t0 else 0.0
+        self.events.publish("progress",json.dumps({"bars":self.bars,"total":self.total,"bars_per_sec":(self.bars/dt) if dt>0 else None,"ts":env["ts"],"equity":env["equity"],"position":env["position"],"cash":env["cash"]},separators=(",",":")))
+    def end(self):self.events.close("done",json.dumps(self.info(),separators=(",",":")))
+
+def _audit(env,o):
+    if o.get("event")=="reject":METRICS.inc("fintech_rejects_total",reason=o.get("reason",""))
+    sym=env.get("sym")
+    if sym:o["sym"]=sym
+    env["ctx"].audit.append(json.dumps(o,separators=(",",":")))
+
 def _apply_fill(env,side,qty,price,fee,ts):
     if qty<=0:return 0.0
     if side=="BUY":
         cost=price*qty+fee
         if env["cash"]>=cost:
-            env["cash"]-=cost;env["position"]+=qty
-            STATE["audit"].append(json.dumps({"ts":ts,"event":"fill","side":"BUY","qty":qty,"price":price,"fee":fee},separators=(",",":")))
+            env["cash"]-=cost;env["position"]+=qty;env["ctx"].perf.fill(qty,price,fee)
+            _audit(env,{"ts":ts,"event":"fill","side":"BUY","qty":qty,"price":price,"fee":fee})
             return qty
         else:
-            STATE["audit"].append(json.dumps({"ts":ts,"event":"reject","reason":"insufficient_cash"},separators=(",",":")))
+            _audit(env,{"ts":ts,"event":"reject","reason":"insufficient_cash"})
             return 0.0
     else:
         qty=min(qty,env["position"])
+        if env["position"]-qty<=1e-9*env["position"]:qty=env["position"]
         proceeds=price*qty-fee
-        env["cash"]+=proceeds;env["position"]-=qty
-        STATE["audit"].append(json.dumps({"ts":ts,"event":"fill","side":"SELL","qty":qty,"price":price,"fee":fee},separators=(",",":")))
+        env["cash"]+=proceeds;env["position"]-=qty;env["ctx"].perf.fill(qty,price,fee)
+        _audit(env,{"ts":ts,"event":"fill","side":"SELL","qty":qty,"price":price,"fee":fee})
         return qty
 
+# Child-order scheduler: working parents spawn children on a (due,seq) heap; each child fills against the bar active at its due time, runs of equal children due on the same bar in one batched fill
+class Scheduler:
+    __slots__=("heap","seq","orders","nid","cap_ts","cap_left","stale")
+    def __init__(self):self.heap=[];self.seq=0;self.orders={};self.nid=0;self.cap_ts=None;self.cap_left=0.0;self.stale=0
+    def submit(self,env,side,qty,kids,ts,algo):
+        self.nid+=1;oid=self.nid;self.orders[oid]={"id":oid,"side":side,"qty":qty,"filled":0.0,"open":len(kids),"algo":algo,"ts":ts}
+        for due,q in kids:heapq.heappush(self.heap,(due,self.seq,oid,q));self.seq+=1
+        _audit(env,{"ts":ts,"event":"order_working","order":oid,"algo":algo,"side":side,"qty":qty,"children":len(kids)})
+        return oid
+    def cancel(self,env,ts,oid=None,side=None):
+        gone=[o for o in list(self.orders.values()) if (oid is None or o["id"]==oid) and (side is None or o["side"]==side)]
+        for o in gone:
+            del self.orders[o["id"]];self.stale+=o["open"];_audit(env,{"ts":ts,"event":"order_cancelled","order":o["id"],"filled":o["filled"],"remaining":o["qty"]-o["filled"]})
+        if not self.orders:self.heap=[];self.stale=0
+        elif self.stale>len(self.heap)//2:self.heap=[e for e in self.heap if e[2] in self.orders];heapq.heapify(self.heap);self.stale=0
+        return [o["id"] for o in gone]
+    def drain(self,env,cfg,upto,incl,bts,price,vol):
+        ex=cfg.get("execution",{});fee_bps=float(ex.get("fee_bps",0.2));slip_bps=float(ex.get("slip_bps",0.8))
+        pov=float(ex["pov"].get("participation",0.1)) if ex.get("pov",{}).get("enabled",False) else None
+        h=self.heap;carry=[];nxt=upto+1 if incl else upto;det={k for k in ("twap","iceberg") if ex.get(k,{}).get("detail",False)}
+        if pov is not None and self.cap_ts!=bts:self.cap_ts=bts;self.cap_left=pov_qty(pov,max(1.0,vol))
+        while h and (h[0][0]<=upto if incl else h[0][0]<upto):
+            if pov is not None and self.cap_left<=0:break
+            due,_,oid,q=heapq.heappop(h);o=self.orders.get(oid)
+            if o is None:self.stale-=1;continue
+            fq=q if pov is None else min(q,self.cap_left)
+            f=0.0;n=1;ts=last=max(due,bts)
+            if fq>0 and (o["side"]=="BUY" or env["position"]>0):
+                if fq==q and o["algo"] not in det:
+                    lim=len(h)+1 if pov is None else int(self.cap_left//q)
+                    while n<lim and h and h[0][2]==oid and h[0][3]==q and (h[0][0]<=upto if incl else h[0][0]<upto):last=max(heapq.heappop(h)[0],bts);n+=1
+                rq=o["qty"]-o["filled"]-(n-1)*q if fq==q and o["open"]==n else fq
+                if abs(rq-fq)>1e-9*fq:rq=fq
+                ep,fee=exec_price_fee(o["side"],rq if n==1 else fq,price,fee_bps,slip_bps)
+                f=_apply_fill(env,o["side"],rq,ep,fee,ts) if n==1 else _fill_children(env,o["side"],q,n-1,rq,ep,fee_bps/10000.0,ts,o["algo"])
+                if pov is not None:self.cap_left-=f
+            o["filled"]+=f
+            if fq<q and f>=fq:carry.append((oid,q-fq))
+            else:
+                o["open"]-=n
+                if o["open"]<=0:
+                    del self.orders[oid];_audit(env,{"ts":last,"event":"order_done","order":oid,"filled":o["filled"],"qty":o["qty"]})
+        for oid,q in carry:heapq.heappush(h,(nxt,self.seq,oid,q));self.seq+=1
+    def info(self):return {"working":len(self.orders),"children":len(self.heap)}
+
+# Batched children: n equal slices plus an optional remainder at one price, cash limit and fees solved in closed form, one audit line
+def _fill_children(env,side,child,n,last,ep,fr,ts,algo):
+    if side=="BUY":
+        unit=ep*child*(1.0+fr);cash=env["cash"];k=n if unit<=0 else min(n,int(cash//unit))
+        while k>0 and k*unit>cash:k-=1
+        while k<n and (k+1)*unit<=cash:k+=1
+        q=k*child;kids=k;short=k<n
+        if not short and last>0:
+            if cash-k*unit>=ep*last*(1.0+fr):q+=last;kids+=1
+            else:short=True
+        if q>0:
+            fee=ep*q*fr;env["cash"]-=ep*q+fee;env["position"]+=q;env["ctx"].perf.fill(q,ep,fee,kids)
+            _audit(env,{"ts":ts,"event":"fill","side":"BUY","qty":q,"price":ep,"fee":fee,"children":kids,"algo":algo})
+        if short:_audit(env,{"ts":ts,"event":"reject","reason":"insufficient_cash"})
+        return q
+    tot=n*child+last;q=min(tot,env["position"])
+    if env["position"]-q<=1e-9*env["position"]:q=env["position"]
+    if q<=0:return 0.0
+    kids=n+(1 if last>0 else 0) if q>=tot else int(math.ceil(q/child))
+    fee=ep*q*fr;env["cash"]+=ep*q-fee;env["position"]-=q;env["ctx"].perf.fill(q,ep,fee,kids)
+    _audit(env,{"ts":ts,"event":"fill","side":"SELL","qty":q,"price":ep,"fee":fee,"children":kids,"algo":algo})
+    return q
+
 def exec_algo(cfg,env,side,qty,ref_price,ts):
-    ex=cfg.get("execution",{})
+    ex=cfg.get("execution",{});sc=env.get("sched")
     fee_bps=float(ex.get("fee_bps",0.2));slip_bps=float(ex.get("slip_bps",0.8))
     if ex.get("twap",{}).get("enabled",False):
         slices=int(ex["twap"].get("slices",10));duration_ms=int(ex["twap"].get("duration_ms",600000))
         if slices<1:slices=1
         per=qty/float(slices)
+        if sc is not None:
+            sc.submit(env,side,qty,[(ts+i*(duration_ms//slices),per) for i in range(slices)],ts,"twap")
+            return None
+        if not ex["twap"].get("detail",False):
+            ep,_=exec_price_fee(side,qty,ref_price,fee_bps,slip_bps)
+            return _fill_children(env,side,per,slices-1,qty-per*(slices-1),ep,fee_bps/10000.0,ts,"twap")
         filled=0.0
         for i in range(slices):
             q=min(qty-filled,per)
@@ -230,7 +924,7 @@ def exec_algo(cfg,env,side,qty,ref_price,ts):
             filled+=_apply_fill(env,side,q,ep,fee,ts+i*(duration_ms//max(1,slices)))
         return filled
     if ex.get("vwap",{}).get("enabled",False):
-        vwp=vwap_price(int(ex["vwap"].get("window",50)),env["close_series"])
+        vw=env.get("vwap");vwp=vw.cur if vw is not None else vwap_price(int(ex["vwap"].get("window",50)),env.get("close_series",()))
         base=ref_price if vwp is None else vwp
         ep,fee=exec_price_fee(side,qty,base,fee_bps,slip_bps)
         return _apply_fill(env,side,qty,ep,fee,ts)
@@ -241,8 +935,15 @@ def exec_algo(cfg,env,side,qty,ref_price,ts):
         ep,fee=exec_price_fee(side,q,ref_price,fee_bps,slip_bps)
         return _apply_fill(env,side,q,ep,fee,ts)
     if ex.get("iceberg",{}).get("enabled",False):
-        child=int(ex["iceberg"].get("child_size",1000))
+        child=int(ex["iceberg"].get("child_size",1000));iv=int(ex["iceberg"].get("interval_ms",0))
         if child<1:child=1
+        if sc is not None and iv>0:
+            n=int(math.ceil(qty/float(child)))
+            sc.submit(env,side,qty,[(ts+i*iv,min(child,qty-i*child)) for i in range(n)],ts,"iceberg")
+            return None
+        if not ex["iceberg"].get("detail",False):
+            n=int(qty//child);ep,_=exec_price_fee(side,qty,ref_price,fee_bps,slip_bps)
+            return _fill_children(env,side,float(child),n,qty-n*child,ep,fee_bps/10000.0,ts,"iceberg")
         remain=qty;filled=0.0
         while remain>0:
             q=min(child,remain)
@@ -254,67 +955,561 @@ def exec_algo(cfg,env,side,qty,ref_price,ts):
     ep,fee=exec_price_fee(side,qty,ref_price,fee_bps,slip_bps)
     return _apply_fill(env,side,qty,ep,fee,ts)
 
-def backtest(cfg,data,outdir):
-    os.makedirs(outdir,exist_ok=True)
-    STATE["audit"].clear();STATE["trace"].clear()
-    ch=hcfg(cfg);STATE["audit"].append(json.dumps({"ts":now_ms(),"event":"config_snapshot","hash":ch,"cfg":cfg},separators=(",",":")))
-    env={"ts":0,"close_series":[],"position":0.0,"cash":float(cfg.get("initial_cash",100000000.0)),"equity":float(cfg.get("initial_cash",100000000.0)),"equity_peak":float(cfg.get("initial_cash",100000000.0)),"fills":[],"bar_volume":0.0}
-    dsl=cfg.get("strategy",STATE["cfg"]["strategy"])
-    fee=float(cfg.get("execution",{}).get("fee_bps",0.2));slip=float(cfg.get("execution",{}).get("slip_bps",0.8))
-    STATE["daily"]["start_ts"]=0;STATE["daily"]["start_equity"]=env["equity"];STATE["daily"]["loss"]=0.0
-    la=len(data)
-    for idx in range(la):
-        b=data[idx]
-        env["ts"]=b["ts"];env["bar_volume"]=b.get("volume",0.0)
-        env["close_series"].append(b["close"])
-        denv={"close":env["close_series"],"fast":None,"slow":None,"position":env["position"]} 
-        act=apply_dsl(dsl,denv)
-        daily_roll(env,cfg,b["ts"])
-        if act:
-            if act["action"]=="BUY":
-                q=float(act.get("qty",0))
-                ok,rr=risk_check_pre(env,cfg,"BUY",q,b["close"])
-                if ok and q>0:
-                    filled=exec_algo(cfg,env,"BUY",q,b["close"],b["ts"])
-                    if filled<=0.0:STATE["audit"].append(json.dumps({"ts":b["ts"],"event":"reject","reason":"no_fill"},separators=(",",":")))
-                else:
-                    STATE["audit"].append(json.dumps({"ts":b["ts"],"event":"reject","reason":rr},separators=(",",":")))
-            elif act["action"]=="SELL":
-                q=float(act.get("qty",0));ok,rr=risk_check_pre(env,cfg,"SELL",q,b["close"])
-                if ok and q>0:
-                    filled=exec_algo(cfg,env,"SELL",q,b["close"],b["ts"])
-                    if filled<=0.0:STATE["audit"].append(json.dumps({"ts":b["ts"],"event":"reject","reason":"no_fill"},separators=(",",":")))
-                else:
-                    STATE["audit"].append(json.dumps({"ts":b["ts"],"event":"reject","reason":rr},separators=(",",":")))
-            elif act["action"]=="SELL_ALL":
-                q=env["position"]
-                if q>0.0:
-                    ok,rr=risk_check_pre(env,cfg,"SELL",q,b["close"])
-                    if ok:
-                        exec_algo(cfg,env,"SELL",q,b["close"],b["ts"])
-                    else:
-                        STATE["audit"].append(json.dumps({"ts":b["ts"],"event":"reject","reason":rr},separators=(",",":")))
-        env["equity"]=env["cash"]+env["position"]*b["close"]
+# Bar engine: strategy/risk/execution state advanced one bar at a time, shared by backtest and live paper runs
+def _recorders(ctx,cfg,outdir):
+    rc=cfg.get("recorder",{});fl=int(rc.get("flush",4096));tl=int(rc.get("tail",1000))
+    au=ctx.audit;ctx.audit=Recorder(os.path.join(outdir,"audit.jsonl"),fl,tl);ctx.trace=Recorder(os.path.join(outdir,"trace.jsonl"),fl,tl)
+    for ln in au:ctx.audit.append(ln)
+
+def _risk_pre(env,cfg,side,q,c):
+    tm=env.get("tm")
+    if tm is None:return risk_check_pre(env,cfg,side,q,c)
+    p=time.perf_counter();r=risk_check_pre(env,cfg,side,q,c);tm[3]+=time.perf_counter()-p;return r
+
+def _exec(cfg,env,side,q,c,t):
+    tm=env.get("tm")
+    if tm is None:return exec_algo(cfg,env,side,q,c,t)
+    p=time.perf_counter();r=exec_algo(cfg,env,side,q,c,t);tm[4]+=time.perf_counter()-p;return r
+
+def _order(env,cfg,act,c,t):
+    if act["action"]=="BUY":
+        q=float(act.get("qty",0))
+        ok,rr=_risk_pre(env,cfg,"BUY",q,c)
+        if ok and q>0:
+            filled=_exec(cfg,env,"BUY",q,c,t)
+            if filled is not None and filled<=0.0:_audit(env,{"ts":t,"event":"reject","reason":"no_fill"})
+        else:
+            _audit(env,{"ts":t,"event":"reject","reason":rr})
+    elif act["action"]=="SELL":
+        q=float(act.get("qty",0));ok,rr=_risk_pre(env,cfg,"SELL",q,c)
+        if ok and q>0:
+            filled=_exec(cfg,env,"SELL",q,c,t)
+            if filled is not None and filled<=0.0:_audit(env,{"ts":t,"event":"reject","reason":"no_fill"})
+        else:
+            _audit(env,{"ts":t,"event":"reject","reason":rr})
+    elif act["action"]=="SELL_ALL":
+        if env.get("sched") is not None and env["sched"].orders:env["sched"].cancel(env,t,side="BUY")
+        q=env["position"]
+        if q>0.0:
+            ok,rr=_risk_pre(env,cfg,"SELL",q,c)
+            if ok:
+                _exec(cfg,env,"SELL",q,c,t)
+            else:
+                _audit(env,{"ts":t,"event":"reject","reason":rr})
+    elif act["action"]=="CANCEL":
+        if env.get("sched") is not None:env["sched"].cancel(env,t)
+
+class BarEngine:
+    def __init__(self,cfg,ctx):
+        self.cfg=cfg;self.ctx=ctx;self.init=float(cfg.get("initial_cash",100000000.0));self.stop=None
+        self.hash=hcfg(cfg);ctx.audit.append(json.dumps({"ts":now_ms(),"event":"config_snapshot","hash":self.hash,"cfg":cfg},separators=(",",":")))
+        self.env=env={"ctx":ctx,"ts":0,"position":0.0,"cash":self.init,"equity":self.init,"equity_peak":self.init,"fills":[],"bar_volume":0.0,"sched":Scheduler()}
+        self.pb=None;self.pl=compile_dsl(cfg.get("strategy",STATE["cfg"]["strategy"]))
+        ctx.daily["start_ts"]=0;ctx.daily["start_equity"]=env["equity"];ctx.daily["loss"]=0.0
+        self.ind=IndReg({"close":[]});self.objs=plan_bind(self.pl,self.ind) if self.pl else []
+        self.cl=[0.0];self.denv={"close":self.cl,"position":0.0}
+        env["vwap"]=self.vw=vwap_acc(cfg);self.tp=cfg.get("execution",{}).get("vwap",{}).get("price","typical")=="typical"
+        self.sm=max(0,int(STATE.get("metrics_sample",64)));self.k=self.sm or -1;self.ns=0;self.tm=[0.0]*len(STAGES);env["tm"]=None
+    def warm(self,c,v=1.0,ind=True,h=None,l=None):
+        self.cl[0]=c
+        if ind:self.ind.push("close",c,v)
+        if self.vw is not None:self.vw.push((h+l+c)/3.0 if self.tp and h is not None else c,v)
+    def step(self,t,c,v,a=None,h=None,l=None):
+        env=self.env;cfg=self.cfg;ctx=self.ctx;pl=self.pl;sc=env["sched"];tm=None;self.k-=1
+        if not self.k:self.k=self.sm;self.ns+=1;tm=env["tm"]=self.tm;pc=time.perf_counter;p0=pc()
+        if sc.heap and self.pb is not None and sc.heap[0][0]<t:sc.drain(env,cfg,t,False,*self.pb)
+        if tm is not None:p=pc();tm[0]+=p-p0;p0=p
+        env["ts"]=t;env["bar_volume"]=v
+        self.cl[0]=c
+        if self.vw is not None:self.vw.push((h+l+c)/3.0 if self.tp and h is not None else c,v)
+        if a is not None:act=pl["rules"][a][1] if a>=0 else None
+        else:
+            self.ind.push("close",c,v);self.denv["position"]=env["position"]
+            act=plan_eval(pl,self.objs,self.denv) if pl else None
+        daily_roll(env,cfg,t)
+        if tm is not None:p=pc();tm[1]+=p-p0;p0=p
+        if act:_order(env,cfg,act,c,t)
+        if tm is not None:p=pc();tm[2]+=p-p0;p0=p
+        if sc.heap and sc.heap[0][0]<=t:sc.drain(env,cfg,t,True,t,c,v)
+        if tm is not None:p=pc();tm[0]+=p-p0;p0=p
+        self.pb=(t,c,v)
+        env["equity"]=env["cash"]+env["position"]*c
+        if daily_limit_breach(env,cfg):
+            _audit(env,{"ts":t,"event":"circuit_breaker","reason":"daily_loss_limit"});self.stop="daily_loss_limit"
+            return False
+        ok,rr=risk_check_post(env,cfg)
+        if tm is not None:p=pc();tm[5]+=p-p0;p0=p
+        ctx.trace.append(json.dumps({"ts":t,"close":c,"position":env["position"],"cash":env["cash"],"equity":env["equity"]},separators=(",",":")));ctx.perf.bar(env["equity"],env["position"]);ctx.equity.append(env["equity"])
+        if tm is not None:tm[6]+=pc()-p0;env["tm"]=None
+        if not ok:
+            _audit(env,{"ts":t,"event":"circuit_breaker","reason":rr});self.stop=rr
+            return False
+        return True
+    def summary(self,engine="scalar"):
+        env=self.env;pnl=env["equity"]-self.init
+        ret=(pnl/self.init) if self.init>0 else 0.0
+        summ={"initial_cash":self.init,"final_equity":env["equity"],"pnl":pnl,"return":ret,"config_hash":self.hash,"bars":self.ctx.perf.bars,"engine":engine}
+        summ.update(self.ctx.perf.summary(self.init))
+        if env.get("sched") is not None and env["sched"].orders:summ["working_orders"]=env["sched"].info()
+        return summ
+
+def backtest(cfg,data,outdir,ctx=None,warm=0):
+    if outdir:os.makedirs(outdir,exist_ok=True)
+    data=as_store(data)
+    ctx=ctx or RunCtx();ctx.status="running";ctx.started=now_ms();ctx.t0=time.perf_counter()
+    if outdir:_recorders(ctx,cfg,outdir)
+    eg=BarEngine(cfg,ctx);pl=eg.pl;ev=max(1,int(cfg.get("events",{}).get("every",2048)));nxt=ev
+    acts=precompute_actions(pl,data.close,data.volume) if cfg.get("engine","scalar")=="vectorized" and pl and pl["vec"] else None
+    la=len(data);tsc=data.ts;clc=data.close;vlc=data.volume;hic=data.high;loc=data.low;warm=max(0,min(int(warm),la));ctx.total=la-warm;step=eg.step
+    for idx in range(warm):eg.warm(clc[idx],vlc[idx],acts is None,hic[idx],loc[idx])
+    for idx in range(warm,la):
+        if ctx.cancel:_audit(eg.env,{"ts":now_ms(),"event":"cancelled","bars":idx});break
+        ctx.bars=idx+1-warm
+        if not step(tsc[idx],clc[idx],vlc[idx],None if acts is None else acts[idx],hic[idx],loc[idx]):break
+        if idx>=nxt:nxt+=ev;ctx.pulse(eg.env)
+    summ=eg.summary("vectorized" if acts is not None else "scalar")
+    ctx.summary=summ;ctx.status="cancelled" if ctx.cancel else "done";ctx.finished=now_ms()
+    if outdir:ctx.audit.close();ctx.trace.close();write_text(os.path.join(outdir,"summary.json"),json.dumps(summ,indent=2))
+    ctx.pulse(eg.env);ctx.end();METRICS.run("backtest",ctx,eg)
+    return summ
+
+# Portfolio engine: per-symbol signals precomputed in worker processes, bars consumed through a heap merge on ts with shared cash and risk
+def _port_actions(k):
+    pl=compile_dsl(_SWEEP["cfg"])
+    return k,array("b" if len(pl["rules"])<127 else "h",precompute_actions(pl,_SWEEP["data"][k].close,_SWEEP["data"][k].volume)).tobytes()
+
+def port_actions(dsl,stores,workers=None):
+    pl=compile_dsl(dsl);tc="b" if len(pl["rules"])<127 else "h";n=len(stores)
+    workers=max(1,min(int(workers or os.cpu_count() or 1),n))
+    if workers==1 or sum(len(st) for st in stores)<200000:return [array(tc,precompute_actions(pl,st.close,st.volume)) for st in stores]
+    out=[None]*n
+    with _pool(workers,dsl,stores) as ex:
+        for k,b in ex.map(_port_actions,range(n),chunksize=max(1,n//(workers*4))):out[k]=array(tc);out[k].frombytes(b)
+    return out
+
+def backtest_portfolio(cfg,datasets,outdir,ctx=None,workers=None):
+    if outdir:os.makedirs(outdir,exist_ok=True)
+    syms=sorted(datasets);stores=[as_store(datasets[k]) for k in syms];K=len(syms)
+    ctx=ctx or RunCtx();ctx.status="running";ctx.started=now_ms();ctx.t0=time.perf_counter()
+    if outdir:_recorders(ctx,cfg,outdir)
+    eg=BarEngine(cfg,ctx);env=eg.env;env["sched"]=None;pl=eg.pl;rules=pl["rules"] if pl else [];ev=max(1,int(cfg.get("events",{}).get("every",2048)));nxt=ev
+    acts=port_actions(cfg.get("strategy",STATE["cfg"]["strategy"]),stores,workers) if pl and pl["vec"] else None
+    if acts is None:
+        sers=[[0.0] for _ in syms];regs=[IndReg({"close":[]}) for _ in syms];objs=[plan_bind(pl,r) if pl else [] for r in regs];denvs=[{"close":x,"position":0.0} for x in sers]
+    cls=[memoryview(st.close) for st in stores];vls=[st.volume for st in stores];pos=[0.0]*K;last=[0.0]*K
+    vws=[vwap_acc(cfg) for _ in syms] if eg.vw is not None else None;his=[st.high for st in stores];los=[st.low for st in stores]
+    ctx.total=sum(len(st) for st in stores);pf={"mv":0.0,"open":0,"ts":None,"n":0}
+    def mark():
+        env["sym"]=None;env["equity"]=eq=env["cash"]+pf["mv"];pf["n"]+=1
         if daily_limit_breach(env,cfg):
-            STATE["audit"].append(json.dumps({"ts":b["ts"],"event":"circuit_breaker","reason":"daily_loss_limit"},separators=(",",":")))
-            break
+            _audit(env,{"ts":pf["ts"],"event":"circuit_breaker","reason":"daily_loss_limit"});eg.stop="daily_loss_limit";return False
         ok,rr=risk_check_post(env,cfg)
-        STATE["trace"].append(json.dumps({"ts":b["ts"],"close":b["close"],"position":env["position"],"cash":env["cash"],"equity":env["equity"]},separators=(",",":")))
+        ctx.trace.append(json.dumps({"ts":pf["ts"],"cash":env["cash"],"market_value":pf["mv"],"equity":eq,"open":pf["open"]},separators=(",",":")));ctx.perf.bar(eq,pf["mv"]);ctx.equity.append(eq)
         if not ok:
-            STATE["audit"].append(json.dumps({"ts":b["ts"],"event":"circuit_breaker","reason":rr},separators=(",",":")))
-            break
-    pnl=env["equity"]-float(cfg.get("initial_cash",100000000.0))
-    ret=(pnl/float(cfg.get("initial_cash",100000000.0))) if cfg.get("initial_cash",100000000.0)>0 else 0.0
-    sh=sharpe_from_trace(STATE["trace"])
-    summ={"initial_cash":float(cfg.get("initial_cash",100000000.0)),"final_equity":env["equity"],"pnl":pnl,"return":ret,"fills":len([x for x in STATE["audit"] if '"event":"fill"' in x]),"sharpe":sh,"config_hash":ch,"bars":len(STATE["trace"])}
-    write_lines(os.path.join(STATE["outdir"],"audit.jsonl"),STATE["audit"]);write_lines(os.path.join(STATE["outdir"],"trace.jsonl"),STATE["trace"]);write_text(os.path.join(STATE["outdir"],"summary.json"),json.dumps(summ,indent=2))
+            _audit(env,{"ts":pf["ts"],"event":"circuit_breaker","reason":rr});eg.stop=rr;return False
+        return True
+    merged=heapq.merge(*[zip(x.ts,itertools.repeat(k),range(len(x))) for k,x in enumerate(stores)])
+    live=True
+    for t,k,i in merged:
+        if ctx.cancel:_audit(env,{"ts":now_ms(),"event":"cancelled","bars":ctx.bars});live=False;break
+        if t!=pf["ts"]:
+            if pf["ts"] is not None and not mark():live=False;break
+            pf["ts"]=env["ts"]=t;daily_roll(env,cfg,t)
+        ctx.bars+=1;c=cls[k][i];p=pos[k]
+        if p:pf["mv"]+=p*(c-last[k])
+        last[k]=c
+        if acts is not None:
+            a=acts[k][i];act=rules[a][1] if a>=0 else None
+        else:
+            sers[k][0]=c;regs[k].push("close",c,vls[k][i]);denvs[k]["position"]=p;act=plan_eval(pl,objs[k],denvs[k]) if pl else None
+        if vws is not None:vws[k].push((his[k][i]+los[k][i]+c)/3.0 if eg.tp else c,vls[k][i])
+        if act:
+            env["position"]=p;env["sym"]=syms[k];env["bar_volume"]=vls[k][i];env["vwap"]=vws[k] if vws is not None else None
+            _order(env,cfg,act,c,t);q=env["position"]
+            if q!=p:pf["mv"]+=(q-p)*c;pos[k]=q;pf["open"]+=(q!=0.0)-(p!=0.0)
+        if ctx.bars>=nxt:nxt+=ev;ctx.pulse(env)
+    if live and pf["ts"] is not None:mark()
+    env["sym"]=None;env["equity"]=env["cash"]+pf["mv"]
+    summ=eg.summary("vectorized" if acts is not None else "scalar")
+    summ.update({"symbols":K,"symbol_bars":ctx.bars,"timestamps":pf["n"],"positions":{syms[k]:pos[k] for k in range(K) if pos[k]}})
+    ctx.summary=summ;ctx.status="cancelled" if ctx.cancel else "done";ctx.finished=now_ms()
+    if outdir:ctx.audit.close();ctx.trace.close();write_text(os.path.join(outdir,"summary.json"),json.dumps(summ,indent=2))
+    ctx.pulse(env);ctx.end();METRICS.run("portfolio",ctx)
     return summ
 
+# Live paper engine: keeps BarEngine state between stream ticks and consumes only newly appended bars
+class LiveEngine:
+    def __init__(self,name,cfg,outdir):
+        self.name=name;self.ctx=RunCtx("live-"+name);self.ctx.status="running";self.ctx.started=now_ms();self.ctx.t0=time.perf_counter()
+        _recorders(self.ctx,cfg,outdir);self.eg=BarEngine(cfg,self.ctx);self.store=None;self.pos=0;self.last_ts=None
+        self.ns=0;self.lock=threading.Lock()
+    def feed(self,store):
+        with self.lock:
+            if self.eg.stop or store is None:return 0
+            if store is not self.store:
+                self.store=store;self.pos=0 if self.last_ts is None else bisect.bisect_right(store.ts,self.last_ts)
+            n0=self.pos;n=len(store);tsc=store.ts;clc=store.close;vlc=store.volume;hic=store.high;loc=store.low;step=self.eg.step;t0=time.perf_counter_ns();f0=self.ctx.perf.fills
+            for i in range(n0,n):
+                self.ctx.bars+=1;self.last_ts=tsc[i];self.pos=i+1
+                if not step(tsc[i],clc[i],vlc[i],None,hic[i],loc[i]):self.ctx.status="stopped";break
+            self.ns+=time.perf_counter_ns()-t0
+            self.ctx.audit.flush();self.ctx.trace.flush()
+            if self.pos>n0:
+                self.ctx.pulse(self.eg.env);METRICS.inc("fintech_bars_total",self.pos-n0,kind="live");METRICS.inc("fintech_fills_total",self.ctx.perf.fills-f0,kind="live")
+                if self.eg.ns:METRICS.stages(self.eg)
+            return self.pos-n0
+    def info(self):
+        env=self.eg.env;b=self.ctx.bars
+        return {"name":self.name,"status":self.ctx.status,"stop":self.eg.stop,"bars":b,"last_ts":self.last_ts,"position":env["position"],"cash":env["cash"],"equity":env["equity"],"pnl":env["equity"]-self.eg.init,"us_per_bar":(self.ns/1000.0/b) if b else None,"fills":self.ctx.perf.fills,"orders":env["sched"].info()}
+    def cancel(self,oid=None):
+        with self.lock:
+            r=self.eg.env["sched"].cancel(self.eg.env,self.last_ts or now_ms(),oid);self.ctx.audit.flush();return r
+    def close(self):
+        with self.lock:self.ctx.status="stopped" if self.ctx.status=="running" else self.ctx.status;self.ctx.audit.close();self.ctx.trace.close();self.ctx.end()
+
+def live_start(name,cfg,catchup=True):
+    s=STATE["streams"].get(name)
+    if s is None:return None
+    old=STATE["live"].pop(name,None)
+    if old:old.close()
+    lv=LiveEngine(name,json.loads(json.dumps(cfg)),os.path.join(STATE["outdir"],"live",name))
+    st=stream_settled(s)
+    if st is not None and not catchup:
+        lv.store=st;lv.pos=len(st);lv.last_ts=st.ts[-1] if len(st) else None;w=lv.eg.warm
+        for c,v,h,l in zip(st.close,st.volume,st.high,st.low):w(c,v,True,h,l)
+    STATE["live"][name]=lv;lv.feed(st)
+    return lv
+
+def live_stop(name):
+    lv=STATE["live"].pop(name,None)
+    if lv:lv.close()
+    return lv
+
+# Parameter sweep: backtests fanned out over a process pool; bars saved once to the cache dir and mmapped by every worker, so pages are shared rather than pickled per worker
+_SWEEP={}
+def _sweep_init(cfg,data):_SWEEP["cfg"]=cfg;_SWEEP["data"]=bars_in(data)
+
+def bars_ref(st):
+    p=os.path.join(cache_dir(),st.digest()+".bars")
+    if os.path.exists(p):os.utime(p,None)
+    else:store_save(st,p)
+    return p
+
+def bars_out(x):
+    try:
+        if isinstance(x,BarStore):return bars_ref(x)
+        if isinstance(x,list) and x and all(isinstance(v,BarStore) for v in x):return [bars_ref(v) for v in x]
+    except OSError:pass
+    return x
+
+def bars_in(x):
+    if isinstance(x,list):return [bars_in(v) for v in x]
+    if not isinstance(x,str):return x
+    st=store_open(x);st.sha=os.path.basename(x)[:-5];return st
+
+def set_path(c,path,v):
+    ks=path.split(".")
+    for k in ks[:-1]:c=c.setdefault(k,{})
+    c[ks[-1]]=v
+
+def sweep_points(spec):
+    if "points" in spec:return [dict(p) for p in spec["points"]]
+    g=spec.get("grid",{});ks=list(g)
+    return [dict(zip(ks,vs)) for vs in itertools.product(*[g[k] if isinstance(g[k],list) else [g[k]] for k in ks])]
+
+def _sweep_one(ov):
+    cfg=json.loads(json.dumps(_SWEEP["cfg"]))
+    for k,v in ov.items():set_path(cfg,k,v)
+    try:s=backtest(cfg,_SWEEP["data"],None)
+    except Exception as e:return {"params":ov,"error":str(e)}
+    return {"params":ov,"pnl":s["pnl"],"return":s["return"],"sharpe":s["sharpe"],"fills":s["fills"],"final_equity":s["final_equity"],"bars":s["bars"]}
+
+def _pool(workers,cfg,data,init=_sweep_init):
+    mc=multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+    return ProcessPoolExecutor(max_workers=workers,mp_context=mc,initializer=init,initargs=(cfg,bars_out(data)))
+
+def run_sweep(cfg,data,spec):
+    pts=sweep_points(spec);rank=spec.get("rank","sharpe");t0=time.time()
+    workers=max(1,min(int(spec.get("workers",os.cpu_count() or 1)),len(pts) or 1))
+    with _pool(workers,cfg,as_store(data)) as ex:res=list(ex.map(_sweep_one,pts,chunksize=max(1,len(pts)//(workers*4))))
+    res.sort(key=lambda r:(r.get(rank) is not None,r.get(rank) or 0.0),reverse=True)
+    return {"points":len(pts),"workers":workers,"rank":rank,"secs":time.time()-t0,"results":res}
+
+# Walk-forward: params optimized per train window, scored on the following test window, out-of-sample equity stitched
+def wf_folds(n,train,test,mode="rolling"):
+    out=[];s=0
+    while s+train+test<=n:out.append((0 if mode=="anchored" else s,s+train,s+train+test));s+=test
+    return out
+
+def wf_warmup(cfg,pts):
+    w=0
+    for ov in pts or [{}]:
+        c=json.loads(json.dumps(cfg))
+        for k,v in ov.items():set_path(c,k,v)
+        pl=compile_dsl(c.get("strategy",STATE["cfg"]["strategy"]))
+        if pl:w=max([w]+[x[2] for x in pl["inds"]])
+    return w
+
+def _wf_run(cfg,data,ov,a,b,warm):
+    cfg=json.loads(json.dumps(cfg))
+    for k,v in ov.items():set_path(cfg,k,v)
+    a0=max(0,a-warm);ctx=RunCtx()
+    return backtest(cfg,data[a0:b],None,ctx,a-a0),ctx
+
+def _wf_fold(job):return wf_fold(_SWEEP["cfg"],_SWEEP["data"],job)
+
+def wf_fold(cfg,data,job):
+    i,a,b,c,pts,rank,warm=job;best=None;bs=None;tried=0
+    for ov in pts:
+        try:s,_=_wf_run(cfg,data,ov,a,b,warm)
+        except Exception:continue
+        tried+=1;sc=s.get(rank)
+        if best is None or (sc is not None and (bs is None or sc>bs)):best=ov;bs=sc
+    if best is None:return {"fold":i,"error":"no_valid_params"}
+    s,ctx=_wf_run(cfg,data,best,b,c,warm)
+    return {"fold":i,"params":best,"train_score":bs,"tried":tried,"test":{k:s.get(k) for k in("final_equity","return","sharpe","sortino","max_drawdown","fills","bars")},"curve":ctx.equity.tobytes()}
+
+def run_walkforward(cfg,data,spec):
+    data=as_store(data);n=len(data);t0=time.time()
+    train=int(spec.get("train",n//4));test=int(spec.get("test",max(1,n//8)));mode=spec.get("mode","rolling");rank=spec.get("rank","sharpe")
+    pts=sweep_points(spec) or [{}];warm=int(spec["warmup"]) if "warmup" in spec else wf_warmup(cfg,pts)
+    folds=wf_folds(n,train,test,mode);jobs=[(i,a,b,c,pts,rank,warm) for i,(a,b,c) in enumerate(folds)]
+    workers=max(1,min(int(spec.get("workers",os.cpu_count() or 1)),len(jobs) or 1))
+    if workers==1:res=[wf_fold(cfg,data,j) for j in jobs]
+    else:
+        with _pool(workers,cfg,data) as ex:res=list(ex.map(_wf_fold,jobs))
+    init=float(cfg.get("initial_cash",100000000.0));eq=init;perf=Perf();curve=[];tsc=data.ts
+    for (a,b,c),r in zip(folds,res):
+        r["train"]=[tsc[a],tsc[b-1]];r["test_range"]=[tsc[b],tsc[c-1]]
+        cv=array("d");cv.frombytes(r.pop("curve",b""))
+        base=eq
+        for j,x in enumerate(cv):
+            eq=base*x/init;perf.bar(eq,0.0);curve.append((tsc[b+j],eq))
+    step=max(1,len(curve)//int(spec.get("points_max",2000)))
+    oos={"initial_cash":init,"final_equity":eq,"return":(eq-init)/init if init>0 else 0.0,"bars":perf.bars,"sharpe":perf.sharpe(),"sortino":perf.sortino(),"max_drawdown":perf.mdd}
+    return {"mode":mode,"train":train,"test":test,"warmup":warm,"rank":rank,"points":len(pts),"workers":workers,"secs":time.time()-t0,"folds":res,"oos":oos,"equity":curve[::step]}
+
+# Monte Carlo: non-overlapping block bootstrap of bar returns (per-block stats precomputed, paths composed block-wise) or trade shuffle
+def mc_blocks(eq,L):
+    if _np is not None:
+        e=_np.asarray(eq,dtype=float);ok=e[:-1]>0;r=_np.diff(e)[ok]/e[:-1][ok];nb=len(r)//L
+        x=r[:nb*L].reshape(nb,L);lg=_np.log1p(x);cs=_np.cumsum(lg,axis=1)
+        rm=_np.maximum.accumulate(_np.concatenate((_np.zeros((nb,1)),cs),axis=1),axis=1)[:,1:]
+        return {"g":cs[:,-1],"hi":_np.maximum(cs.max(axis=1),0.0),"lo":_np.minimum(cs.min(axis=1),0.0),"dd":(rm-cs).max(axis=1),"s1":x.sum(axis=1),"s2":(x*x).sum(axis=1),"nb":nb,"L":L}
+    r=[eq[i]/eq[i-1]-1.0 for i in range(1,len(eq)) if eq[i-1]>0];nb=len(r)//L
+    o={"g":[],"hi":[],"lo":[],"dd":[],"s1":[],"s2":[],"nb":nb,"L":L}
+    for b in range(nb):
+        c=0.0;hi=0.0;lo=0.0;dd=0.0;s1=0.0;s2=0.0
+        for v in r[b*L:(b+1)*L]:
+            c+=math.log1p(v);s1+=v;s2+=v*v
+            if c>hi:hi=c
+            if c<lo:lo=c
+            if hi-c>dd:dd=hi-c
+        for k,v in(("g",c),("hi",hi),("lo",lo),("dd",dd),("s1",s1),("s2",s2)):o[k].append(v)
+    return o
+
+def _mc_sharpe(s1,s2,n):
+    m=s1/n;v=s2/n-m*m
+    return (m/math.sqrt(v))*math.sqrt(252.0) if v>1e-300 else float("nan")
+
+def mc_bootstrap(st,B,seed):
+    nb=st["nb"];N=float(nb*st["L"]);ret=[];shp=[];mdd=[]
+    if nb==0:return ret,shp,mdd
+    if _np is not None:
+        rng=_np.random.default_rng(seed);bs=max(1,min(B,2000000//nb));g,hi,lo,dd,s1,s2=(st[k] for k in("g","hi","lo","dd","s1","s2"))
+        for b0 in range(0,B,bs):
+            ix=rng.integers(0,nb,(min(bs,B-b0),nb));gp=g[ix];E=_np.cumsum(gp,axis=1);Eb=E-gp
+            pa=_np.maximum.accumulate(_np.maximum(Eb+hi[ix],0.0),axis=1);pb=_np.concatenate((_np.zeros((len(ix),1)),pa[:,:-1]),axis=1)
+            d=_np.maximum(dd[ix],pb-Eb-lo[ix]).max(axis=1);S1=s1[ix].sum(axis=1);S2=s2[ix].sum(axis=1);m=S1/N;v=S2/N-m*m
+            ret.extend(_np.expm1(E[:,-1]).tolist());mdd.extend((-_np.expm1(-d)).tolist())
+            with _np.errstate(divide="ignore",invalid="ignore"):shp.extend(_np.where(v>1e-300,m/_np.sqrt(_np.maximum(v,1e-300))*math.sqrt(252.0),_np.nan).tolist())
+        return ret,shp,mdd
+    rng=random.Random(seed)
+    for _ in range(B):
+        E=0.0;pk=0.0;d=0.0;S1=0.0;S2=0.0
+        for _ in range(nb):
+            i=rng.randrange(nb);d=max(d,st["dd"][i],pk-E-st["lo"][i]);pk=max(pk,E+st["hi"][i]);E+=st["g"][i];S1+=st["s1"][i];S2+=st["s2"][i]
+        ret.append(math.expm1(E));mdd.append(-math.expm1(-d));shp.append(_mc_sharpe(S1,S2,N))
+    return ret,shp,mdd
+
+def mc_trades(pnl,init,B,seed,replace=False):
+    k=len(pnl);ret=[];shp=[];mdd=[]
+    if k==0:return ret,shp,mdd
+    if _np is not None:
+        rng=_np.random.default_rng(seed);x=_np.asarray(pnl,dtype=float);bs=max(1,min(B,2000000//k))
+        for b0 in range(0,B,bs):
+            n=min(bs,B-b0);ix=rng.integers(0,k,(n,k)) if replace else _np.argsort(rng.random((n,k)),axis=1);p=x[ix]
+            eq=init+_np.cumsum(p,axis=1);pk=_np.maximum.accumulate(_np.maximum(eq,init),axis=1)
+            ret.extend(((eq[:,-1]-init)/init).tolist());mdd.extend(((pk-eq)/pk).max(axis=1).tolist())
+            m=p.mean(axis=1);sd=p.std(axis=1)
+            with _np.errstate(divide="ignore",invalid="ignore"):shp.extend(_np.where(sd>0,m/sd,_np.nan).tolist())
+        return ret,shp,mdd
+    rng=random.Random(seed);x=list(pnl)
+    for _ in range(B):
+        p=[x[rng.randrange(k)] for _ in range(k)] if replace else rng.sample(x,k);eq=init;pk=init;d=0.0
+        for v in p:
+            eq+=v
+            if eq>pk:pk=eq
+            elif pk>0 and (pk-eq)/pk>d:d=(pk-eq)/pk
+        ret.append((eq-init)/init);m=sum(p)/k;v=sum(y*y for y in p)/k-m*m;shp.append(m/math.sqrt(v) if v>1e-300 else float("nan"));mdd.append(d)
+    return ret,shp,mdd
+
+def _mc_init(src,init):_SWEEP["mc"]=(src,init)
+
+def _mc_part(job):return mc_part(*(_SWEEP["mc"]+job))
+
+def mc_part(src,init,mode,B,seed,replace):
+    return mc_bootstrap(src,B,seed) if mode=="bootstrap" else mc_trades(src,init,B,seed,replace)
+
+def _ci(xs,qs):
+    xs=sorted(x for x in xs if x==x);n=len(xs)
+    o={"p%g"%(q*100):(xs[min(n-1,max(0,int(round(q*(n-1)))))] if n else None) for q in qs}
+    o["mean"]=sum(xs)/n if n else None
+    return o
+
+def run_montecarlo(ctx,spec):
+    t0=time.time();mode=spec.get("mode","bootstrap");B=max(1,int(spec.get("resamples",1000)));seed=int(spec.get("seed",STATE["cfg"].get("seed",0)))
+    init=float((ctx.summary or {}).get("initial_cash",STATE["cfg"].get("initial_cash",100000000.0)));eq=ctx.equity;n=len(eq)
+    L=max(1,int(spec.get("block",max(1,round(n**(1.0/3)))) ));qs=[float(q) for q in spec.get("ci",[0.05,0.5,0.95])];replace=bool(spec.get("replace",False))
+    src=mc_blocks(eq,L) if mode=="bootstrap" else ctx.perf.trade_pnls()
+    workers=max(1,min(int(spec.get("workers",1)),B))
+    if workers==1:res=[mc_part(src,init,mode,B,seed,replace)]
+    else:
+        parts=[B//workers+(1 if i<B%workers else 0) for i in range(workers)]
+        with _pool(workers,src,init,_mc_init) as ex:res=list(ex.map(_mc_part,[(mode,b,seed+i,replace) for i,b in enumerate(parts)]))
+    ret=[x for r in res for x in r[0]];shp=[x for r in res for x in r[1]];mdd=[x for r in res for x in r[2]]
+    sm=ctx.summary or {};obs={"return":(eq[-1]-init)/init if n and init>0 else None,"sharpe":sm.get("sharpe"),"max_drawdown":sm.get("max_drawdown")}
+    if mode=="bootstrap":ci={"return":_ci(ret,qs),"sharpe":_ci(shp,qs),"max_drawdown":_ci(mdd,qs)};na=[]
+    else:
+        k=len(src);m=sum(src)/k if k else 0.0;v=sum(x*x for x in src)/k-m*m if k else 0.0;obs["trade_sharpe"]=m/math.sqrt(v) if v>1e-300 else None
+        ci={"return":_ci(ret,qs) if replace else None,"sharpe":None,"trade_sharpe":_ci(shp,qs) if replace else None,"max_drawdown":_ci(mdd,qs)}
+        na=["sharpe"]+([] if replace else ["return","trade_sharpe"])
+    pl=(sum(1 for x in ret if x<0)/float(len(ret))) if ret and "return" not in na else None
+    return {"run":ctx.id,"mode":mode,"resamples":len(ret),"bars":n,"block":L if mode=="bootstrap" else None,"trades":len(ctx.perf.trade_pnls()),"replace":replace if mode!="bootstrap" else None,"workers":workers,"seed":seed,"secs":time.time()-t0,"observed":obs,"ci":ci,"not_applicable":na,"prob_loss":pl}
+
+# Result cache: finished runs keyed by (config hash, dataset hash, engine version); summary plus audit/trace/equity files, LRU by bytes
+ENGINE_VERSION="1"
+def result_dir():return os.path.join(cache_dir(),"results")
+def result_key(cfg,data):return hashlib.sha256((hcfg(cfg)+as_store(data).digest()+ENGINE_VERSION).encode()).hexdigest()[:32]
+
+def result_get(key,ctx,outdir=None):
+    d=os.path.join(result_dir(),key)
+    try:meta=load_json(os.path.join(d,"result.json"))
+    except Exception:return None
+    src=d
+    if outdir:
+        try:
+            os.makedirs(outdir,exist_ok=True)
+            for fn in("audit.jsonl","trace.jsonl"):
+                dst=os.path.join(outdir,fn)
+                if os.path.lexists(dst):os.remove(dst)
+                try:os.link(os.path.join(d,fn),dst)
+                except OSError:shutil.copyfile(os.path.join(d,fn),dst)
+            src=outdir
+        except OSError:return None
+    tl=1000;ctx.audit=Recorder.attach(os.path.join(src,"audit.jsonl"),tl,meta["audit_n"]);ctx.trace=Recorder.attach(os.path.join(src,"trace.jsonl"),tl,meta["trace_n"])
+    with open(os.path.join(d,"equity.bin"),"rb") as f:ctx.equity=array("d");ctx.equity.frombytes(f.read())
+    with open(os.path.join(d,"trades.bin"),"rb") as f:ctx.perf.trades.frombytes(f.read())
+    os.utime(os.path.join(d,"result.json"))
+    summ=dict(meta["summary"],cached=True);ctx.summary=summ;ctx.bars=ctx.total=len(ctx.equity);ctx.status="done";ctx.started=ctx.started or now_ms();ctx.finished=now_ms()
+    if outdir:write_text(os.path.join(outdir,"summary.json"),json.dumps(summ,indent=2))
+    ctx.end();return summ
+
+def result_put(key,ctx,outdir):
+    d=os.path.join(result_dir(),key);tmp=d+".tmp%d"%threading.get_ident()
+    try:
+        os.makedirs(tmp,exist_ok=True)
+        for fn in("audit.jsonl","trace.jsonl"):shutil.copyfile(os.path.join(outdir,fn),os.path.join(tmp,fn))
+        with open(os.path.join(tmp,"equity.bin"),"wb") as f:f.write(ctx.equity.tobytes())
+        with open(os.path.join(tmp,"trades.bin"),"wb") as f:f.write(ctx.perf.trade_pnls().tobytes())
+        nb=sum(os.path.getsize(os.path.join(tmp,fn)) for fn in os.listdir(tmp))
+        write_text(os.path.join(tmp,"result.json"),json.dumps({"key":key,"version":ENGINE_VERSION,"created":now_ms(),"bytes":nb,"audit_n":len(ctx.audit),"trace_n":len(ctx.trace),"summary":{k:v for k,v in ctx.summary.items() if k!="cached"}}))
+        if os.path.isdir(d):shutil.rmtree(d,ignore_errors=True)
+        os.replace(tmp,d)
+    except OSError:shutil.rmtree(tmp,ignore_errors=True);return False
+    result_evict();return True
+
+def result_list():
+    d=result_dir();out=[]
+    if not os.path.isdir(d):return out
+    for k in os.listdir(d):
+        p=os.path.join(d,k,"result.json")
+        try:m=load_json(p);out.append({"key":k,"bytes":m["bytes"],"used":int(os.stat(p).st_mtime*1000),"config_hash":m["summary"].get("config_hash"),"final_equity":m["summary"].get("final_equity")})
+        except Exception:continue
+    out.sort(key=lambda e:e["used"],reverse=True);return out
+
+def result_evict(budget=None):
+    budget=int(STATE.get("result_cache_bytes",0)) if budget is None else budget
+    es=result_list();tot=sum(e["bytes"] for e in es);gone=[]
+    for e in reversed(es):
+        if tot<=budget:break
+        shutil.rmtree(os.path.join(result_dir(),e["key"]),ignore_errors=True);tot-=e["bytes"];gone.append(e["key"])
+    return gone
+
+def result_purge(key=""):
+    gone=[]
+    for e in result_list():
+        if key and e["key"]!=key:continue
+        shutil.rmtree(os.path.join(result_dir(),e["key"]),ignore_errors=True);gone.append(e["key"])
+    return gone
+
+def backtest_cached(cfg,data,outdir,ctx,use=True):
+    key=result_key(cfg,data)
+    if use:
+        summ=result_get(key,ctx,outdir)
+        METRICS.inc("fintech_result_cache_total",result="miss" if summ is None else "hit")
+        if summ is not None:return summ
+    summ=backtest(cfg,data,outdir,ctx)
+    if outdir and ctx.status=="done":result_put(key,ctx,outdir)
+    summ["cached"]=False;return summ
+
+# Job queue: backtests submitted to a bounded worker pool and tracked via /jobs
+_JOBPOOL=[]
+def _job_pool():
+    if not _JOBPOOL:_JOBPOOL.append(ThreadPoolExecutor(max_workers=int(STATE.get("job_workers",2)),thread_name_prefix="job"))
+    return _JOBPOOL[0]
+
+def _run_job(ctx,cfg,data,outdir,use=True):
+    if ctx.cancel:ctx.status="cancelled";ctx.finished=now_ms();ctx.end();return
+    try:backtest_cached(cfg,data,outdir,ctx,use)
+    except Exception as e:
+        ctx.status="error";ctx.error=str(e);ctx.finished=now_ms()
+        ctx.audit.append(json.dumps({"ts":now_ms(),"event":"run_error","error":str(e),"trace":traceback.format_exc()},separators=(",",":")));ctx.end()
+
+def run_dir(rid):return os.path.join(STATE["outdir"],"runs",rid)
+
+_JOBLOCK=threading.Lock()
+def job_add():
+    with _JOBLOCK:
+        jobs=STATE["jobs"]
+        if sum(1 for c in jobs.values() if c.status in("queued","running"))>=int(STATE.get("job_queue",64)):return None
+        ctx=RunCtx();jobs[ctx.id]=ctx
+        done=[k for k,c in jobs.items() if c.status not in("queued","running")]
+        gone=[k for k in done[:max(0,len(jobs)-256)] if k!=STATE["run_id"]]
+        for k in gone:jobs.pop(k,None)
+    for k in gone:shutil.rmtree(run_dir(k),ignore_errors=True)
+    return ctx
+
+def submit_job(cfg,data,use=True):
+    ctx=job_add()
+    if ctx is None:return None
+    _job_pool().submit(_run_job,ctx,json.loads(json.dumps(cfg)),data,run_dir(ctx.id),use)
+    return ctx
+
+def run_cfg(cfg,execm,riskm):
+    cfg=json.loads(json.dumps(cfg))
+    try:
+        if execm:cfg["execution"]=run_exec_module(execm,cfg)
+        if riskm and riskm in STATE["modules"].get("risk",{}):
+            for k,v in STATE["modules"]["risk"][riskm].get("limits",{}).items():cfg["risk"][k]=v
+    except Exception:pass
+    return cfg
+
 # Plugin registry and autodetect
 def register_module(actor,role,kind,name,obj):
     if not allowed(role,"module.load") and not allowed(role,"import.plugin"):return False,"rbac_denied"
     STATE["modules"].setdefault(kind,{})[name]=obj
-    STATE["audit"].append(json.dumps({"ts":now_ms(),"event":"module_register","kind":kind,"name":name,"actor":actor,"role":role},separators=(",",":")))
+    STATE["log"].append(json.dumps({"ts":now_ms(),"event":"module_register","kind":kind,"name":name,"actor":actor,"role":role},separators=(",",":")))
     return True,"ok"
 
 def autodetect_plugin(obj):
@@ -331,21 +1526,20 @@ def autodetect_plugin(obj):
 
 def run_data_module(name,params):
     m=STATE["modules"]["data"].get(name)
-    if not m:return []
+    if not m:return BarStore()
     t=m.get("type")
     if t=="embedded_csv":return load_bars_csv_text(m.get("csv",""))
     if t=="http_text":
         u=params.get("url",m.get("url",""))
         try:
             with urllib.request.urlopen(u,timeout=10) as r:text=r.read().decode("utf-8","ignore")
-        except Exception:return []
+        except Exception:return BarStore()
         if m.get("format")=="csv":return load_bars_csv_text(text)
-        return []
+        return BarStore()
     if t=="json_schema":
-        arr=m.get("data",[]);b=[];ap=b.append
-        for o in arr:ap({"ts":parse_ts(o["ts"]),"open":float(o["open"]),"high":float(o["high"]),"low":float(o["low"]),"close":float(o["close"]),"volume":float(o.get("volume",0.0))})
-        b.sort(key=lambda x:x["ts"]);return b
-    return []
+        arr=m.get("data",[])
+        return BarStore.from_rows({"ts":parse_ts(o["ts"]),"open":float(o["open"]),"high":float(o["high"]),"low":float(o["low"]),"close":float(o["close"]),"volume":float(o.get("volume",0.0))} for o in arr)
+    return BarStore()
 
 def run_strategy_module(name):
     m=STATE["modules"]["strategy"].get(name)
@@ -359,18 +1553,66 @@ def run_exec_module(name,cfg):
     for k,v in m.items():ex[k]=v
     return ex
 
+# Stream polling: conditional GET plus byte-range deltas, only new complete rows are parsed and merged;
+# a quiet feed's unterminated last line is merged provisionally but stays in pending, so the completed line replaces that bar by ts
+def _stream_tail(s):
+    pd=s.get("pending",b"");hd=s.get("hdr",b"")
+    if not hd or not pd.strip() or pd==s.get("tail") or pd.count(b",")<hd.count(b","):return 0
+    new=ingest_csv(hd+b"\n"+pd+b"\n")[0]
+    if not len(new):return 0
+    st,n=store_merge(s.get("store") or BarStore(),new);s["store"]=st;s["tail"]=pd;return n
+
+def stream_settled(s):
+    st=s.get("store")
+    return st[:-1] if st is not None and len(st) and s.get("pending") and s.get("tail")==s["pending"] else st
+
+def stream_poll(s):
+    url=s["url"];h={}
+    if s.get("etag"):h["If-None-Match"]=s["etag"]
+    elif s.get("lm"):h["If-Modified-Since"]=s["lm"]
+    rng=bool(s.get("hdr")) and s.get("ranges",False) and s.get("offset",0)>0
+    if rng:h["Range"]="bytes=%d-"%(s["offset"]-1)
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url,headers=h),timeout=10) as r:code=r.status;hd=r.headers;body=r.read()
+    except urllib.error.HTTPError as e:
+        if e.code==304:return {"code":304,"appended":_stream_tail(s),"bytes":0}
+        if e.code==416:s["offset"]=0;s["hdr"]=b"";s["pending"]=b"";return {"code":416,"appended":0,"bytes":0}
+        raise
+    s["etag"]=hd.get("ETag") or "";s["lm"]=hd.get("Last-Modified") or ""
+    if code==206:
+        cr=hd.get("Content-Range","")
+        if not cr.startswith("bytes %d-"%(s["offset"]-1)) or body[:1]!=s.get("last",b""):
+            s["offset"]=0;s["hdr"]=b"";s["pending"]=b"";s["etag"]="";s["lm"]="";return {"code":206,"appended":0,"bytes":len(body),"resync":True}
+        buf=s.get("pending",b"")+body[1:];s["offset"]+=len(body)-1
+    else:
+        s["ranges"]=hd.get("Accept-Ranges","").lower()=="bytes";s["offset"]=len(body)
+        hl,_,buf=body.partition(b"\n");s["hdr"]=hl.rstrip(b"\r")
+    if body:s["last"]=body[-1:]
+    k=buf.rfind(b"\n");s["pending"]=buf[k+1:];done=buf[:k+1]
+    new=ingest_csv(s["hdr"]+b"\n"+done)[0] if done.strip() else BarStore()
+    st,n=store_merge(s.get("store") or BarStore(),new);s["store"]=st
+    if code==206 and len(body)<=1:n+=_stream_tail(s);st=s["store"]
+    return {"code":code,"appended":n,"bytes":len(body),"rows":len(st)}
+
 def start_stream(name,url,interval_ms):
     if name in STATE["streams"] and STATE["streams"][name].get("running",False):return
     def loop():
         while STATE["streams"].get(name,{}).get("running",False):
+            s=STATE["streams"][name]
             try:
-                with urllib.request.urlopen(url,timeout=10) as r:t=r.read().decode("utf-8","ignore")
-                bars=load_bars_csv_text(t);STATE["data"]=bars
-                STATE["audit"].append(json.dumps({"ts":now_ms(),"event":"stream_tick","name":name,"rows":len(bars)},separators=(",",":")))
+                old=s.get("store");t0=time.perf_counter()
+                try:r=stream_poll(s)
+                finally:METRICS.obs("fintech_stream_fetch_seconds",time.perf_counter()-t0)
+                if r["appended"] or r["code"]==200:
+                    if not len(STATE["data"]) or (old is not None and STATE["data"] is old):STATE["data"]=s["store"]
+                    lv=STATE["live"].get(name)
+                    if lv:r["live"]=lv.feed(stream_settled(s))
+                STATE["log"].append(json.dumps({"ts":now_ms(),"event":"stream_tick","name":name,"code":r["code"],"appended":r["appended"],"bytes":r["bytes"],"rows":len(s.get("store") or ())},separators=(",",":")))
             except Exception as e:
-                STATE["audit"].append(json.dumps({"ts":now_ms(),"event":"stream_error","name":name,"error":str(e)},separators=(",",":")))
+                METRICS.inc("fintech_stream_errors_total")
+                STATE["log"].append(json.dumps({"ts":now_ms(),"event":"stream_error","name":name,"error":str(e)},separators=(",",":")))
             time.sleep(max(0.01,interval_ms/1000.0))
-    STATE["streams"][name]={"running":True,"url":url,"interval_ms":interval_ms}
+    STATE["streams"][name]={"running":True,"url":url,"interval_ms":interval_ms,"offset":0,"hdr":b"","pending":b""}
     threading.Thread(target=loop,daemon=True).start()
 
 def stop_stream(name):
@@ -395,8 +1637,8 @@ pre{background:#0b0d10;padding:8px;border-radius:6px;overflow:auto;max-height:32
 <section><h2>Import Plugin (JSON)</h2><label>Plugin name (optional)</label><input id=impname placeholder='optional_name'><label>Paste JSON</label><textarea id=imp rows=12></textarea><button onclick="importPlugin()">Import</button><h3>Registered Modules</h3><pre id=mods></pre></section>
 <section><h2>Results</h2><pre id=out></pre><h3>Audit</h3><pre id=audit></pre><h3>Trace</h3><pre id=trace></pre></section>
 </main><script>
-async function load(){let r=await fetch('/state');let s=await r.json();document.getElementById('dsl').value=JSON.stringify(s.cfg.strategy,null,2);document.getElementById('cfg').innerHTML='<pre>'+JSON.stringify(s.cfg,null,2)+'</pre>';document.getElementById('mods').textContent=JSON.stringify(s.modules,null,2);preview(s.data)}
-function preview(d){let p=document.getElementById('datap');p.textContent=''+d.length+' rows\\n'+d.slice(0,5).map(x=>JSON.stringify(x)).join('\\n')}
+async function load(){let r=await fetch('/state');let s=await r.json();document.getElementById('dsl').value=JSON.stringify(s.cfg.strategy,null,2);document.getElementById('cfg').innerHTML='<pre>'+JSON.stringify(s.cfg,null,2)+'</pre>';document.getElementById('mods').textContent=JSON.stringify(s.modules,null,2);let d=await (await fetch('/data?limit=5&format=rows')).json();preview(s.dataset,d.data)}
+function preview(m,d){let p=document.getElementById('datap');p.textContent=''+m.rows+' rows\\n'+d.map(x=>JSON.stringify(x)).join('\\n')}
 async function saveCfg(){let s=JSON.parse(document.getElementById('dsl').value);let cur=JSON.parse(document.getElementById('cfg').textContent);let b=cur; b.strategy=s; let role=document.getElementById('role').value;await fetch('/config?role='+role,{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify(b)});load()}
 async function resetCfg(){await fetch('/reset',{method:'POST'});load()}
 async function upload(){let f=document.getElementById('up').files[0];let t=await f.text();await fetch('/data',{method:'POST',headers:{'Content-Type':'text/csv'},body:t});load()}
@@ -404,30 +1646,161 @@ async function fetchUrl(){let u=document.getElementById('url').value;let r=await
 async function runModule(){let n=document.getElementById('modn').value;let p=document.getElementById('modp').value;let r=await fetch('/run_module?name='+encodeURIComponent(n),{method:'POST',headers:{'Content-Type':'application/json'},body:p});let t=await r.json();await fetch('/data',{method:'POST',headers:{'Content-Type':'text/csv'},body:t.csv});load()}
 async function applyStrategyModule(){let n=document.getElementById('strmod').value;if(!n){return}let r=await fetch('/strategy_apply?name='+encodeURIComponent(n),{method:'POST'});await r.text();load()}
 async function importPlugin(){let name=document.getElementById('impname').value;let txt=document.getElementById('imp').value;let role=document.getElementById('role').value;await fetch('/import_plugin?role='+role+'&name='+encodeURIComponent(name),{method:'POST',headers:{'Content-Type':'application/json'},body:txt});load()}
-async function run(){document.getElementById('out').textContent='running...';let role=document.getElementById('role').value;let execm=document.getElementById('execmod').value;let riskm=document.getElementById('riskmod').value;let r=await fetch('/run?role='+role+'&exec='+encodeURIComponent(execm)+'&risk='+encodeURIComponent(riskm),{method:'POST'});let s=await r.json();document.getElementById('out').textContent=JSON.stringify(s,null,2);document.getElementById('audit').textContent=await (await fetch('/audit')).text();document.getElementById('trace').textContent=await (await fetch('/trace')).text()}
+async function run(){let o=document.getElementById('out'),au=document.getElementById('audit'),tr=document.getElementById('trace');o.textContent='running...';let role=document.getElementById('role').value;let execm=document.getElementById('execmod').value;let riskm=document.getElementById('riskmod').value;let r=await fetch('/jobs?role='+role+'&exec='+encodeURIComponent(execm)+'&risk='+encodeURIComponent(riskm),{method:'POST'});if(!r.ok){o.textContent='error '+r.status;return}let j=await r.json();let a=[],t=[];au.textContent='';tr.textContent='';let es=new EventSource('/runs/'+j.id+'/events');es.addEventListener('progress',e=>{let p=JSON.parse(e.data);t.push(p.ts+' '+p.equity.toFixed(2)+' pos='+p.position);if(t.length>500)t.splice(0,t.length-500);o.textContent='running '+j.id+' '+p.bars+'/'+p.total+' bars '+(p.bars_per_sec?Math.round(p.bars_per_sec):'-')+' bars/s equity='+p.equity.toFixed(2);tr.textContent=t.join('\\n')});es.addEventListener('audit',e=>{let m=JSON.parse(e.data);for(let x of m.events)a.push(JSON.stringify(x));if(m.dropped)a.push('... '+m.dropped+' more');if(a.length>500)a.splice(0,a.length-500);au.textContent=a.join('\\n')});es.addEventListener('done',e=>{es.close();let d=JSON.parse(e.data);o.textContent=JSON.stringify(d.summary||d,null,2)})}
 load()
 </script></body></html>"""
 
+HTML_ETAG=hashlib.sha256(HTML).hexdigest()[:32]
+
+def accept_encoding(h):
+    ok={}
+    for part in h.split(","):
+        n,_,q=part.strip().partition(";q=")
+        try:ok[n.strip().lower()]=float(q) if q else 1.0
+        except ValueError:pass
+    for e in("gzip","deflate"):
+        if ok.get(e,ok.get("*",0.0))>0:return e
+    return None
+
+def _encoder(enc):
+    return zlib.compressobj(6,zlib.DEFLATED,31 if enc=="gzip" else 15)
+
+def http_route(path,code):
+    if code==404:return "other"
+    ps=path.split("/")[:4]
+    if len(ps)>2 and ps[1] in("runs","jobs","datasets","live"):ps[2]=":id"
+    return "/".join(ps)
+
 class Handler(http.server.SimpleHTTPRequestHandler):
-    def do_GET(self):
-        if self.path=="/":
-            self.send_response(200);self.send_header("Content-Type","text/html");self.end_headers();self.wfile.write(HTML)
-        elif self.path=="/state":
-            self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps({"cfg":STATE["cfg"],"data":STATE["data"],"modules":STATE["modules"]},separators=(",",":")).encode())
-        elif self.path.startswith("/fetch"):
-            q=urllib.parse.urlparse(self.path).query;u=urllib.parse.parse_qs(q).get("url",[""])[0]
+    def send_response(self,code,message=None):self._code=code;super().send_response(code,message)
+    def _timed(self,m,fn):
+        self._code=0;t0=time.perf_counter()
+        try:fn()
+        finally:
+            r=http_route(self.path.split("?",1)[0],self._code);METRICS.obs("fintech_http_request_seconds",time.perf_counter()-t0,method=m,route=r);METRICS.inc("fintech_http_requests_total",method=m,route=r,code=self._code)
+    def do_GET(self):self._timed("GET",self._get)
+    def do_POST(self):self._timed("POST",self._post)
+    def _not_modified(self,etag):
+        inm=self.headers.get("If-None-Match","")
+        if not etag or not inm:return False
+        if inm.strip()!="*" and '"%s"'%etag not in [x.strip() for x in inm.split(",")]:return False
+        self.send_response(304);self.send_header("ETag",'"%s"'%etag);self.end_headers();return True
+    def _send(self,body,ctype="application/json",etag=None,code=200,headers=None):
+        big=len(body)>=512;enc=accept_encoding(self.headers.get("Accept-Encoding","")) if big else None;etag=etag and (etag+"-"+enc if enc else etag)
+        if self._not_modified(etag):return
+        if enc:z=_encoder(enc);body=z.compress(body)+z.flush()
+        self.send_response(code);self.send_header("Content-Type",ctype)
+        if etag:self.send_header("ETag",'"%s"'%etag)
+        if big:self.send_header("Vary","Accept-Encoding")
+        if enc:self.send_header("Content-Encoding",enc)
+        for k,v in (headers or {}).items():self.send_header(k,v)
+        self.send_header("Content-Length",str(len(body)));self.end_headers();self.wfile.write(body)
+    def _json(self,o,etag=None,code=200):self._send(json.dumps(o,separators=(",",":")).encode(),"application/json",etag,code)
+    def _send_chunked(self,parts,ctype="text/plain",etag=None):
+        enc=accept_encoding(self.headers.get("Accept-Encoding",""));z=_encoder(enc) if enc else None;etag=etag and (etag+"-"+enc if enc else etag)
+        if self._not_modified(etag):return
+        ch=self.request_version!="HTTP/1.0";self.close_connection=True
+        if ch:self.protocol_version="HTTP/1.1"
+        self.send_response(200);self.send_header("Content-Type",ctype);self.send_header("Connection","close");self.send_header("Vary","Accept-Encoding")
+        if ch:self.send_header("Transfer-Encoding","chunked")
+        if etag:self.send_header("ETag",'"%s"'%etag)
+        if enc:self.send_header("Content-Encoding",enc)
+        self.end_headers();wr=self.wfile.write;w=(lambda p:wr(b"%x\r\n%s\r\n"%(len(p),p))) if ch else wr
+        for p in parts:
+            if z:p=z.compress(p)
+            if p:w(p)
+        if z:
+            p=z.flush()
+            if p:w(p)
+        if ch:wr(b"0\r\n\r\n")
+    def _data(self,q):
+        ref=q.get("dataset",[""])[0]
+        return STATE["data"] if not ref else ds_get(ref)
+    def _lines(self,x,full,extra=()):
+        if full and isinstance(x,Recorder):
+            x.flush()
+            with open(x.path,"rb") as f:
+                for c in iter(lambda:f.read(1<<16),b""):yield c
+            if extra:yield "\n".join(extra).encode("utf-8")
+            return
+        buf=[];n=0;first=True
+        for ln in itertools.chain(x,extra):
+            b=ln.encode("utf-8") if first else b"\n"+ln.encode("utf-8");first=False
+            buf.append(b);n+=len(b)
+            if n>=1<<16:yield b"".join(buf);buf=[];n=0
+        if buf:yield b"".join(buf)
+    def _sse(self,ctx):
+        try:last=int(self.headers.get("Last-Event-ID","0") or 0)
+        except ValueError:last=0
+        self.close_connection=True
+        self.send_response(200);self.send_header("Content-Type","text/event-stream");self.send_header("Cache-Control","no-cache");self.send_header("Connection","close");self.end_headers()
+        try:
+            while True:
+                evs,closed=ctx.events.since(last)
+                if evs:
+                    self.wfile.write("".join("id: %d\nevent: %s\ndata: %s\n\n"%e for e in evs).encode("utf-8"));last=evs[-1][0]
+                elif not closed:self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+                if closed and last>=ctx.events.seq:return
+        except (BrokenPipeError,ConnectionResetError):return
+    def _get(self):
+        path=self.path.split("?",1)[0];q=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        if path=="/":
+            self._send(HTML,"text/html",HTML_ETAG)
+        elif path=="/state":
+            d=STATE["data"];et=hashlib.sha256((hcfg({"cfg":STATE["cfg"],"modules":STATE["modules"]})+d.digest()).encode()).hexdigest()[:32]
+            if self._not_modified(et):return
+            self._json({"cfg":STATE["cfg"],"dataset":d.meta(),"modules":STATE["modules"]},et)
+        elif path=="/data":
+            d=self._data(q)
+            if d is None:self._send(b"unknown_dataset","text/plain",None,404);return
+            et=hashlib.sha256((d.digest()+"?"+urllib.parse.urlparse(self.path).query).encode()).hexdigest()[:32]
+            if self._not_modified(et):return
+            try:r=data_query(d,q)
+            except ValueError as e:self._send(str(e).encode(),"text/plain",None,400);return
+            if isinstance(r,tuple):self._send(r[1],"application/octet-stream",et,200,r[0]);return
+            self._json(r,et)
+        elif path.startswith("/fetch"):
+            u=q.get("url",[""])[0]
             try:
                 with urllib.request.urlopen(u,timeout=10) as r:t=r.read().decode("utf-8","ignore")
             except Exception as e:t=""
-            self.send_response(200);self.send_header("Content-Type","text/plain");self.end_headers();self.wfile.write(t.encode("utf-8"))
-        elif self.path=="/audit":
-            self.send_response(200);self.send_header("Content-Type","text/plain");self.end_headers();self.wfile.write(("\n".join(STATE["audit"])).encode("utf-8"))
-        elif self.path=="/trace":
-            self.send_response(200);self.send_header("Content-Type","text/plain");self.end_headers();self.wfile.write(("\n".join(STATE["trace"])).encode("utf-8"))
+            self._send(t.encode("utf-8"),"text/plain")
+        elif path=="/metrics":
+            self._send(METRICS.render(metrics_gauges()).encode(),"text/plain; version=0.0.4")
+        elif path=="/datasets":
+            self._json(ds_info())
+        elif path.startswith("/datasets/"):
+            e=STATE["datasets"].get(urllib.parse.unquote(path[10:]))
+            if e is None:self._send(b"unknown_dataset","text/plain",None,404);return
+            self._json(ds_meta(e),e["hash"][:32])
+        elif path=="/cache":
+            es=cache_list();rs=result_list()
+            self._json({"dir":cache_dir(),"budget":STATE.get("cache_bytes",0),"bytes":sum(e["bytes"] for e in es),"entries":es,"results":{"budget":STATE.get("result_cache_bytes",0),"bytes":sum(e["bytes"] for e in rs),"entries":rs}})
+        elif path=="/live" or path.startswith("/live/"):
+            if path=="/live":o=[lv.info() for lv in list(STATE["live"].values())]
+            else:
+                lv=STATE["live"].get(urllib.parse.unquote(path[6:]))
+                if lv is None:self.send_response(404);self.end_headers();return
+                o=lv.info()
+            self._json(o)
+        elif path=="/jobs":
+            self._json([c.info() for c in list(STATE["jobs"].values())])
+        elif path.startswith("/jobs/"):
+            c=STATE["jobs"].get(path[6:])
+            if c is None:self.send_response(404);self.end_headers();return
+            self._json(c.info())
+        elif path.startswith("/runs/") and path.endswith("/events"):
+            rid=path[6:-7];c=STATE["jobs"].get(rid) or next((lv.ctx for lv in list(STATE["live"].values()) if lv.ctx.id==rid),None)
+            if c is None:self.send_response(404);self.end_headers();return
+            self._sse(c)
+        elif path in("/audit","/trace"):
+            x=STATE[path[1:]];full=q.get("full",["0"])[0]=="1";ex=list(STATE["log"]) if path=="/audit" else ()
+            self._send_chunked(self._lines(x,full,ex),"text/plain","%s-%s-%d-%d-%d"%(path[1:],STATE["run_id"],len(x),len(ex),full))
         else:
             super().do_GET()
 
-    def do_POST(self):
+    def _post(self):
         l=int(self.headers.get("Content-Length","0"));b=self.rfile.read(l)
         path=self.path.split("?",1)[0]
         if self.path.startswith("/config"):
@@ -437,7 +1810,32 @@ class Handler(http.server.SimpleHTTPRequestHandler):
             self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps({"ok":ok,"commit":cid},separators=(",",":")).encode())
             return
         if path=="/data":
-            t=b.decode("utf-8","ignore");STATE["data"]=load_bars_csv_text(t);self.send_response(200);self.end_headers();return
+            st=None
+            if b.strip():d,st=cached_ingest(b);ingest_event(st,"upload");STATE["data"]=ds_put(urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query).get("name",["upload"])[0],d,"upload")["store"]
+            else:STATE["data"]=BarStore()
+            self.send_response(200);self.end_headers();return
+        if path=="/datasets":
+            q=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query);role=q.get("role",["viewer"])[0];sn=q.get("stream",[""])[0]
+            if not allowed(role,"data.ingest"):self.send_response(403);self.end_headers();return
+            if sn:
+                s=STATE["streams"].get(sn)
+                if s is None or not s.get("store"):self.send_response(404);self.end_headers();return
+                d=s["store"].copy();st=None
+            elif b.strip():d,st=cached_ingest(b);ingest_event(st,"upload")
+            else:self.send_response(400);self.end_headers();return
+            e=ds_put(q.get("name",[sn or "upload"])[0],d,"stream:"+sn if sn else "upload")
+            if q.get("activate",["0"])[0]=="1":STATE["data"]=e["store"]
+            self._json(ds_meta(e));return
+        if path.startswith("/datasets/") and (path.endswith("/activate") or path.endswith("/drop")):
+            q=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query);role=q.get("role",["viewer"])[0]
+            if not allowed(role,"data.ingest"):self.send_response(403);self.end_headers();return
+            did,act=urllib.parse.unquote(path[10:]).rsplit("/",1);e=STATE["datasets"].get(did)
+            if e is None:self.send_response(404);self.end_headers();return
+            if act=="activate":STATE["data"]=e["store"];e["used"]=now_ms()
+            else:
+                del STATE["datasets"][did]
+                if STATE["data"] is e["store"]:STATE["data"]=BarStore()
+            self._json(ds_meta(e));return
         if path=="/run_module":
             n=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query).get("name",[""])[0]
             try:params=json.loads(b.decode("utf-8"))
@@ -476,45 +1874,140 @@ class Handler(http.server.SimpleHTTPRequestHandler):
             try:payload=json.loads(b.decode("utf-8"));ok,msg=register_module("web",role,kind,name,payload)
             except Exception:ok,msg=False,"bad_json"
             self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps({"ok":ok,"msg":msg},separators=(",",":")).encode());return
-        if path.startswith("/run"):
+        if path=="/run":
             q=urllib.parse.urlparse(self.path).query;params=urllib.parse.parse_qs(q);role=params.get("role",["viewer"])[0];execm=params.get("exec",[""])[0];riskm=params.get("risk",[""])[0]
             if not allowed(role,"run.execute"):self.send_response(403);self.end_headers();return
-            if not STATE["data"]:self.send_response(400);self.end_headers();return
-            try:
-                if execm:STATE["cfg"]["execution"]=run_exec_module(execm,STATE["cfg"])
-                if riskm and riskm in STATE["modules"].get("risk",{}):
-                    rpl=STATE["modules"]["risk"][riskm]
-                    for k,v in rpl.get("limits",{}).items():STATE["cfg"]["risk"][k]=v
-            except Exception:pass
+            d=self._data(params)
+            if not d:self.send_response(400 if d is not None else 404);self.end_headers();return
+            ctx=job_add()
+            if ctx is None:self.send_response(429);self.end_headers();return
             STATE["running"]=True
-            try:summ=backtest(STATE["cfg"],STATE["data"],STATE["outdir"])
+            try:summ=backtest_cached(run_cfg(STATE["cfg"],execm,riskm),d,run_dir(ctx.id),ctx,params.get("nocache",["0"])[0]!="1")
             except Exception as e:
-                STATE["audit"].append(json.dumps({"ts":now_ms(),"event":"run_error","error":str(e),"trace":traceback.format_exc()},separators=(",",":")));summ={"error":"run_error"}
+                ctx.audit.append(json.dumps({"ts":now_ms(),"event":"run_error","error":str(e),"trace":traceback.format_exc()},separators=(",",":")));summ={"error":"run_error"};ctx.status="error";ctx.error=str(e);ctx.end()
+            STATE["audit"]=ctx.audit;STATE["trace"]=ctx.trace;STATE["daily"]=ctx.daily;STATE["run_id"]=ctx.id;STATE["log"]=[]
             STATE["running"]=False
             self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps(summ,separators=(",",":")).encode());return
+        if path=="/run_portfolio":
+            q=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query);role=q.get("role",["viewer"])[0]
+            if not allowed(role,"run.execute"):self.send_response(403);self.end_headers();return
+            try:spec=json.loads(b.decode("utf-8"));ds={k:ds_get(v) or cached_ingest(v.encode("utf-8"))[0] for k,v in spec.get("datasets",{}).items()}
+            except Exception:self.send_response(400);self.end_headers();return
+            if not ds:self.send_response(400);self.end_headers();return
+            ctx=job_add()
+            if ctx is None:self.send_response(429);self.end_headers();return
+            try:summ=backtest_portfolio(run_cfg(STATE["cfg"],q.get("exec",[""])[0],q.get("risk",[""])[0]),ds,run_dir(ctx.id),ctx,spec.get("workers"))
+            except Exception as e:
+                ctx.status="error";ctx.error=str(e);ctx.end();summ={"error":"run_error"}
+            summ=dict(summ,run_id=ctx.id)
+            self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps(summ,separators=(",",":")).encode());return
+        if path=="/jobs":
+            q=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query);role=q.get("role",["viewer"])[0]
+            if not allowed(role,"run.execute"):self.send_response(403);self.end_headers();return
+            d=self._data(q)
+            if not d:self.send_response(400 if d is not None else 404);self.end_headers();return
+            ctx=submit_job(run_cfg(STATE["cfg"],q.get("exec",[""])[0],q.get("risk",[""])[0]),d,q.get("nocache",["0"])[0]!="1")
+            if ctx is None:self.send_response(429);self.end_headers();return
+            self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps(ctx.info(),separators=(",",":")).encode());return
+        if path.startswith("/jobs/") and path.endswith("/cancel"):
+            c=STATE["jobs"].get(path[6:-7])
+            if c is None:self.send_response(404);self.end_headers();return
+            c.cancel=True
+            if c.status=="queued":c.status="cancelled";c.finished=now_ms();c.end()
+            self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps(c.info(),separators=(",",":")).encode());return
+        if path=="/cache_purge":
+            q=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query);role=q.get("role",["viewer"])[0]
+            if not allowed(role,"data.ingest"):self.send_response(403);self.end_headers();return
+            gone=(result_purge if q.get("kind",["bars"])[0]=="results" else cache_purge)(q.get("key",[""])[0])
+            self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps({"purged":gone},separators=(",",":")).encode());return
+        if path=="/live_start":
+            q=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query);role=q.get("role",["viewer"])[0];name=q.get("name",[""])[0]
+            if not allowed(role,"run.execute"):self.send_response(403);self.end_headers();return
+            lv=live_start(name,run_cfg(STATE["cfg"],q.get("exec",[""])[0],q.get("risk",[""])[0]),q.get("from",["start"])[0]!="end")
+            if lv is None:self.send_response(404);self.end_headers();return
+            self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps(lv.info(),separators=(",",":")).encode());return
+        if path=="/live_stop":
+            lv=live_stop(urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query).get("name",[""])[0])
+            self.send_response(200 if lv else 404);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps(lv.info() if lv else {},separators=(",",":")).encode());return
+        if path=="/live_cancel":
+            q=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query);lv=STATE["live"].get(q.get("name",[""])[0])
+            if lv is None:self.send_response(404);self.end_headers();return
+            try:oid=int(q["order"][0]) if q.get("order") else None
+            except ValueError:self.send_response(400);self.end_headers();return
+            self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps({"cancelled":lv.cancel(oid)},separators=(",",":")).encode());return
+        if path=="/sweep":
+            q=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query);role=q.get("role",["viewer"])[0]
+            if not allowed(role,"run.execute"):self.send_response(403);self.end_headers();return
+            d=self._data(q)
+            if not d:self.send_response(400 if d is not None else 404);self.end_headers();return
+            try:spec=json.loads(b.decode("utf-8"))
+            except Exception:self.send_response(400);self.end_headers();self.wfile.write(b"bad_json");return
+            try:res=run_sweep(STATE["cfg"],d,spec)
+            except Exception as e:res={"error":str(e)}
+            self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps(res,separators=(",",":")).encode());return
+        if path=="/montecarlo":
+            q=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query);role=q.get("role",["viewer"])[0]
+            if not allowed(role,"run.execute"):self.send_response(403);self.end_headers();return
+            ctx=STATE["jobs"].get(q.get("run",[STATE["run_id"]])[0])
+            if ctx is None or ctx.status not in("done","cancelled"):self.send_response(404);self.end_headers();return
+            try:spec=json.loads(b.decode("utf-8")) if b.strip() else {}
+            except Exception:self.send_response(400);self.end_headers();self.wfile.write(b"bad_json");return
+            try:res=run_montecarlo(ctx,spec)
+            except Exception as e:res={"error":str(e)}
+            self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps(res,separators=(",",":")).encode());return
+        if path=="/walkforward":
+            q=urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query);role=q.get("role",["viewer"])[0]
+            if not allowed(role,"run.execute"):self.send_response(403);self.end_headers();return
+            d=self._data(q)
+            if not d:self.send_response(400 if d is not None else 404);self.end_headers();return
+            try:spec=json.loads(b.decode("utf-8"))
+            except Exception:self.send_response(400);self.end_headers();self.wfile.write(b"bad_json");return
+            try:res=run_walkforward(STATE["cfg"],d,spec)
+            except Exception as e:res={"error":str(e)}
+            self.send_response(200);self.send_header("Content-Type","application/json");self.end_headers();self.wfile.write(json.dumps(res,separators=(",",":")).encode());return
         if path=="/reset":
-            STATE["cfg"]={"seed":123456789,"initial_cash":100000000.0,"risk":{"max_position":10000000.0,"max_notional":100000000000.0,"max_drawdown":0.25,"daily_loss_limit":5000000.0,"per_trade_loss_limit":1000000.0},"execution":{"fee_bps":0.2,"slip_bps":0.8,"twap":{"enabled":False,"slices":10,"duration_ms":900000},"vwap":{"enabled":False,"window":50},"pov":{"enabled":False,"participation":0.1}},"strategy":{"type":"rule_chain","params":{"fast":20,"slow":100,"rsiw":14},"rules":[{"if":"sma(close,fast)>sma(close,slow) and rsi(close,rsiw)<70","do":"BUY","qty":1000},{"if":"sma(close,fast)<sma(close,slow) or rsi(close,rsiw)>80","do":"SELL_ALL"}]},"rbac":{"roles":{"admin":{"caps":["config.write","run.execute","module.load","data.ingest","stream.manage","import.plugin","export.files"]},"ops":{"caps":["run.execute","data.ingest","stream.manage","import.plugin","export.files"]},"viewer":{"caps":["export.files"]}}},"profile":"paper"}
+            STATE["cfg"]={"seed":123456789,"initial_cash":100000000.0,"risk":{"max_position":10000000.0,"max_notional":100000000000.0,"max_drawdown":0.25,"daily_loss_limit":5000000.0,"per_trade_loss_limit":1000000.0},"execution":{"fee_bps":0.2,"slip_bps":0.8,"twap":{"enabled":False,"slices":10,"duration_ms":900000},"vwap":{"enabled":False,"window":50},"pov":{"enabled":False,"participation":0.1}},"strategy":{"type":"rule_chain","params":{"fast":20,"slow":100,"rsiw":14},"rules":[{"if":"sma(close,fast)>sma(close,slow) and rsi(close,rsiw)<70","do":"BUY","qty":1000},{"if":"sma(close,fast)<sma(close,slow) or rsi(close,rsiw)>80","do":"SELL_ALL"}]},"rbac":{"roles":{"admin":{"caps":["config.write","run.execute","module.load","data.ingest","stream.manage","import.plugin","export.files"]},"ops":{"caps":["run.execute","data.ingest","stream.manage","import.plugin","export.files"]},"viewer":{"caps":["export.files"]}}},"profile":"paper","engine":"scalar"}
             self.send_response(200);self.end_headers();return
         if path=="/export_audit":
             if not (allowed("admin","export.files") or allowed("ops","export.files")):self.send_response(403);self.end_headers();return
-            write_lines(os.path.join(STATE["outdir"],"audit.jsonl"),STATE["audit"]);self.send_response(200);self.end_headers();self.wfile.write(b"exported");return
+            os.makedirs(STATE["outdir"],exist_ok=True);p=os.path.join(STATE["outdir"],"audit.jsonl")
+            with open(p+".tmp","wb") as f:
+                for c in self._lines(STATE["audit"],True,list(STATE["log"])):f.write(c)
+            os.replace(p+".tmp",p)
+            self.send_response(200);self.end_headers();self.wfile.write(b"exported");return
         if path=="/export_trace":
             if not (allowed("admin","export.files") or allowed("ops","export.files")):self.send_response(403);self.end_headers();return
-            write_lines(os.path.join(STATE["outdir"],"trace.jsonl"),STATE["trace"]);self.send_response(200);self.end_headers();self.wfile.write(b"exported");return
+            os.makedirs(STATE["outdir"],exist_ok=True);p=os.path.join(STATE["outdir"],"trace.jsonl")
+            with open(p+".tmp","wb") as f:
+                for c in self._lines(STATE["trace"],True,()):f.write(c)
+            os.replace(p+".tmp",p)
+            self.send_response(200);self.end_headers();self.wfile.write(b"exported");return
         self.send_response(404);self.end_headers();return
 
+class Server(socketserver.ThreadingMixIn,socketserver.TCPServer):
+    daemon_threads=True;allow_reuse_address=True
+
 def serve(host,port):
-    with socketserver.TCPServer((host,port),Handler) as httpd:
+    with Server((host,port),Handler) as httpd:
         httpd.serve_forever()
 
 def main():
-    p=argparse.ArgumentParser();p.add_argument("--host",default="0.0.0.0");p.add_argument("--port",type=int,default=8080);p.add_argument("--out",default="out");p.add_argument("--data");p.add_argument("--config");a=p.parse_args();STATE["outdir"]=a.out
+    p=argparse.ArgumentParser();p.add_argument("--host",default="0.0.0.0");p.add_argument("--port",type=int,default=8080);p.add_argument("--out",default="out");p.add_argument("--data");p.add_argument("--config");p.add_argument("--sweep");p.add_argument("--portfolio");p.add_argument("--walkforward");p.add_argument("--cache",default="");a=p.parse_args();STATE["outdir"]=a.out;STATE["cachedir"]=a.cache
     if a.config:
         try:STATE["cfg"]=load_json(a.config)
         except Exception:pass
     if a.data:
-        try:STATE["data"]=load_bars_csv_text(open(a.data,"r",encoding="utf-8").read())
+        try:d,st=cached_ingest(pathlib.Path(a.data));ingest_event(st,a.data);STATE["data"]=ds_put(os.path.splitext(os.path.basename(a.data))[0],d,a.data)["store"];print("ingested %d rows in %.2fs (%d rows/sec%s)"%(st["rows"],st["secs"],st["rows_per_sec"],", cached" if st["cached"] else ""))
         except Exception:pass
+    if a.sweep:
+        res=run_sweep(STATE["cfg"],STATE["data"],load_json(a.sweep))
+        write_text(os.path.join(STATE["outdir"],"sweep.json"),json.dumps(res,indent=2));print(json.dumps(res["results"][:10],indent=2));return
+    if a.walkforward:
+        res=run_walkforward(STATE["cfg"],STATE["data"],load_json(a.walkforward))
+        write_text(os.path.join(STATE["outdir"],"walkforward.json"),json.dumps(res,indent=2));print(json.dumps({"oos":res["oos"],"folds":[{k:f.get(k) for k in("fold","params","train_score","test")} for f in res["folds"]]},indent=2));return
+    if a.portfolio:
+        spec=load_json(a.portfolio);ds={k:cached_ingest(pathlib.Path(v))[0] for k,v in spec.get("datasets",{}).items()}
+        print(json.dumps(backtest_portfolio(STATE["cfg"],ds,os.path.join(STATE["outdir"],"portfolio"),None,spec.get("workers")),indent=2));return
     t=threading.Thread(target=serve,args=(a.host,a.port),daemon=True);t.start();print("http://%s:%d"%(a.host,a.port))
     try:
         while True:time.sleep(1)